@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""
+Benchmark del RAG pipeline Qdrant (RAG_qdrant_new)
+
+Usage:
+    python benchmark_rag.py warm [--runs N]
+    python benchmark_rag.py parse [--workers 1,2,4,8] [--pdf PATH]
+    python benchmark_rag.py dedup [--thresholds 0.8,0.9,0.95] [--pdf PATH]
+    python benchmark_rag.py chunking [--search | --lexical] [--k 6] [--legal-k 4] [--chunk-tokens 320] [--pdf PATH]
+    python benchmark_rag.py quant [--modes none,scalar,binary,product] [--on-disk] [--always-ram] [--synthetic N] [--location URL]
+    python benchmark_rag.py transport [--url URL] [--queries 500] [--threads 1,8]
+    python benchmark_rag.py mmr [--sizes 30,100,300,1000] [--dim 1536] [--k 6]
+    python benchmark_rag.py batch [--queries 200] [--batch-size 64]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Aggiungi il percorso corretto al PYTHONPATH
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(current_dir, 'src')
+sys.path.insert(0, src_dir)
+
+PDF_PATH = os.path.join(src_dir, 'rag_or_search', 'tools', 'RAG_qdrant_new', 'knowledge_base', 'EU AI Act.pdf')
+
+QUESTIONS = [
+    "Cosa dice l'AI Act sui sistemi di intelligenza artificiale ad alto rischio?",
+    "Cosa deve fare un fornitore di un sistema AI ad alto rischio prima di metterlo sul mercato in UE?",
+    "Chi è responsabile della valutazione dei rischi per un sistema AI ad alto rischio?",
+]
+
+# Domande con il titolo dell'articolo che deve comparire nel contesto recuperato
+LABELED_QUESTIONS = [
+    ("Cosa deve fare un fornitore di un sistema AI ad alto rischio prima di metterlo sul mercato in UE?", "Obligations of providers of high-risk AI systems"),
+    ("Chi è responsabile della valutazione dei rischi per un sistema AI ad alto rischio?", "Risk management system"),
+    ("Quali obblighi di trasparenza verso i deployer hanno i sistemi AI ad alto rischio?", "Transparency and provision of information to deployers"),
+    ("Quali pratiche di intelligenza artificiale sono vietate?", "Prohibited AI practices"),
+    ("Come deve essere garantita la sorveglianza umana dei sistemi ad alto rischio?", "Human oversight"),
+    ("Quali requisiti valgono per i dati di addestramento e la governance dei dati?", "Data and data governance"),
+    ("Quali sanzioni sono previste per la violazione del regolamento?", "Penalties"),
+    ("Quali log devono registrare automaticamente i sistemi ad alto rischio?", "Record-keeping"),
+]
+
+# Le stesse domande in inglese, per il confronto lessicale (BM25) senza embeddings
+LEXICAL_QUESTIONS = [
+    "What must a provider of a high-risk AI system do before placing it on the Union market?",
+    "Who is responsible for assessing the risks of a high-risk AI system?",
+    "What information must high-risk AI systems give to deployers?",
+    "Which artificial intelligence practices are banned?",
+    "How must natural persons supervise high-risk AI systems?",
+    "Which requirements apply to training data and its governance?",
+    "What fines apply to infringements of the regulation?",
+    "Which logs must high-risk AI systems record automatically?",
+]
+
+
+def bench_warm(args):
+    """Compare the first (cold) ``search_rag`` call with the following warm calls"""
+    from src.rag_or_search.tools.RAG_qdrant_new import rag_qdrant_hybrid as rag
+
+    t0 = time.perf_counter()
+    rag.search_rag(QUESTIONS[0], 3)
+    cold = time.perf_counter() - t0
+
+    warm = []
+    for i in range(args.runs):
+        t0 = time.perf_counter()
+        rag.search_rag(QUESTIONS[i % len(QUESTIONS)], 3)
+        warm.append(time.perf_counter() - t0)
+
+    print("=" * 60)
+    print(f"cold call      : {cold * 1000:9.1f} ms")
+    print(f"warm mean      : {statistics.mean(warm) * 1000:9.1f} ms  ({args.runs} runs)")
+    print(f"warm median    : {statistics.median(warm) * 1000:9.1f} ms")
+    print(f"speed-up (mean): {cold / statistics.mean(warm):9.1f}x")
+    for name, st in rag.get_engine().stats().items():
+        print(f"{name:<15}: hit rate {st['hit_rate']:.0%} ({st['hits']} hits, {st['misses']} misses)")
+    print("=" * 60)
+
+
+def bench_parse(args):
+    """Time PDF text extraction for several process-pool sizes"""
+    from src.rag_or_search.tools.RAG_qdrant_new.pdf_loader import iter_page_texts
+
+    base = None
+    print(f"{'workers':>8} {'pages':>6} {'seconds':>9} {'speed-up':>9}")
+    for workers in [int(w) for w in args.workers.split(",")]:
+        t0 = time.perf_counter()
+        pages = sum(1 for _ in iter_page_texts(args.pdf, workers=workers, pages_per_task=args.pages_per_task))
+        elapsed = time.perf_counter() - t0
+        base = base or elapsed
+        print(f"{workers:>8} {pages:>6} {elapsed:>9.2f} {base / elapsed:>8.2f}x")
+
+
+def bench_dedup(args):
+    """Report how many chunks the near-duplicate filter removes from a corpus"""
+    from src.rag_or_search.tools.RAG_qdrant_new import rag_qdrant_hybrid as rag
+    from src.rag_or_search.tools.RAG_qdrant_new.dedup import NearDuplicateFilter
+
+    s = rag.SETTINGS
+    chunks = list(rag.iter_chunks(rag.iter_pdf_pages(args.pdf, s), s))
+    chars = sum(len(c.page_content) for c in chunks)
+    print(f"chunks: {len(chunks)}  ({chars / 1e6:.2f}M chars)")
+    print(f"{'threshold':>9} {'kept':>6} {'dropped':>8} {'shrink':>7} {'seconds':>8}")
+    for threshold in [float(t) for t in args.thresholds.split(",")]:
+        t0 = time.perf_counter()
+        near_dups = NearDuplicateFilter(threshold, s.dedup_num_perm)
+        kept = [c for i, c in enumerate(chunks) if near_dups.check(i, c.page_content) is None]
+        elapsed = time.perf_counter() - t0
+        dropped = len(chunks) - len(kept)
+        print(f"{threshold:>9.2f} {len(kept):>6} {dropped:>8} {dropped / len(chunks):>6.1%} {elapsed:>8.2f}")
+
+
+def bench_chunking(args):
+    """Compare the recursive and the legal chunker: chunk count, context tokens per answer, recall.
+
+    ``--search`` retrieves with the real hybrid search (Azure embeddings);
+    ``--lexical`` ranks the chunks with an in-process BM25 index over the
+    English questions instead, which needs no embeddings. Legal chunks are
+    larger, so they can be retrieved with their own ``--legal-k``. The last
+    line checks the goal: fewer chunks and context tokens at equal or
+    better recall than the recursive chunker.
+    """
+    from dataclasses import replace
+    from qdrant_client import QdrantClient
+    from src.rag_or_search.tools.RAG_qdrant_new import rag_qdrant_hybrid as rag
+    from src.rag_or_search.tools.RAG_qdrant_new.bm25 import Bm25Index
+    from src.rag_or_search.tools.RAG_qdrant_new.embedding_scheduler import estimate_tokens
+
+    norm = lambda t: " ".join(t.split()).lower()
+    print(f"{'chunker':>9} {'k':>3} {'chunks':>7} {'tok/chunk':>10} {'ctx tok/answer':>15} {'recall':>7}")
+    rows = {}
+    for chunker in ("recursive", "legal"):
+        k = args.legal_k if chunker == "legal" and args.legal_k else args.k
+        s = replace(rag.SETTINGS, chunker=chunker, collection=f"bench_{chunker}", final_k=k, kb_sync_on_start=False)
+        if args.chunk_tokens:
+            s = replace(s, chunk_tokens=args.chunk_tokens)
+        chunks = list(rag.iter_chunks(rag.iter_pdf_pages(args.pdf, s), s))
+        tok_chunk = sum(estimate_tokens(c.page_content) for c in chunks) / len(chunks)
+        ctx_tokens, recall = float("nan"), float("nan")
+        retrieve = None
+        if args.search:
+            client = QdrantClient(":memory:")
+            embeddings = rag.get_embeddings(s)
+            rag.recreate_collection_for_rag(client, s, len(embeddings.embed_query("hello world")))
+            rag.ingest_chunks(client, s, iter(chunks), embeddings)
+            retrieve = lambda i: [h.payload.get("text", "") for h in rag.hybrid_search(client, s, LABELED_QUESTIONS[i][0], embeddings)]
+        elif args.lexical:
+            index = Bm25Index(s.bm25_k1, s.bm25_b)
+            for i, c in enumerate(chunks):
+                index.add(str(i), c.page_content)
+            retrieve = lambda i: [chunks[int(pid)].page_content for pid, _ in index.search(LEXICAL_QUESTIONS[i], k)]
+        if retrieve is not None:
+            tokens, found = [], 0
+            for i, (_, title) in enumerate(LABELED_QUESTIONS):
+                texts = retrieve(i)
+                tokens.append(sum(estimate_tokens(t) for t in texts))
+                found += any(norm(title) in norm(t) for t in texts)
+            ctx_tokens = statistics.mean(tokens)
+            recall = found / len(LABELED_QUESTIONS)
+        rows[chunker] = (len(chunks), ctx_tokens, recall)
+        print(f"{chunker:>9} {k:>3} {len(chunks):>7} {tok_chunk:>10.0f} {ctx_tokens:>15.0f} {recall:>7.2f}")
+    if retrieve is not None:
+        (rc, rt, rr), (lc, lt, lr) = rows["recursive"], rows["legal"]
+        met = lc < rc and lt < rt and lr >= rr
+        print(f"fewer chunks and ctx tokens at equal or better recall: {'yes' if met else 'no'}")
+
+
+def index_ram_bytes(settings, n, dim):
+    """Estimated resident RAM of vectors + HNSW links for ``n`` vectors of ``dim`` floats.
+
+    An estimate, not a measurement: Qdrant does not report per-collection
+    RAM. The original vectors are resident unless ``vectors_on_disk``;
+    quantized vectors follow the originals' storage unless
+    ``quantization_always_ram`` pins them in RAM. Memmapped data is not
+    counted, although the page cache may hold it.
+    """
+    original = 0 if settings.vectors_on_disk else n * dim * 4
+    links = n * settings.hnsw_m * 2 * 4
+    quantized = {
+        "none": 0,
+        "scalar": n * dim,
+        "binary": n * dim // 8,
+        "product": n * dim * 4 // int(settings.pq_compression.lstrip("x")),
+    }[settings.quantization]
+    if settings.vectors_on_disk and not settings.quantization_always_ram:
+        quantized = 0
+    return original + quantized + links
+
+
+def bench_quant(args):
+    """Estimated index RAM, p95 latency and recall@k against exact search for each quantization mode"""
+    from dataclasses import replace
+    import numpy as np
+    from qdrant_client import QdrantClient
+    from qdrant_client.models import OptimizersConfigDiff, PointStruct, CollectionStatus
+    from src.rag_or_search.tools.RAG_qdrant_new import rag_qdrant_hybrid as rag
+
+    if args.synthetic:
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(args.synthetic, args.dim)).astype(np.float32)
+        queries = vectors[rng.choice(len(vectors), args.queries)] + rng.normal(scale=0.5, size=(args.queries, args.dim))
+    else:
+        s = rag.SETTINGS
+        embeddings = rag.get_embeddings(s)
+        texts = [c.page_content for c in rag.iter_chunks(rag.iter_pdf_pages(args.pdf, s), s)]
+        vectors = np.array(embeddings.embed_documents(texts), dtype=np.float32)
+        questions = QUESTIONS + [q for q, _ in LABELED_QUESTIONS]
+        queries = np.array(embeddings.embed_documents(questions), dtype=np.float32)
+    queries = queries.tolist()
+    n, dim = vectors.shape
+
+    client = QdrantClient(location=args.location, timeout=60)
+    print(f"vectors: {n} x {dim}, queries: {len(queries)}, k={args.k}")
+    print(f"{'mode':>8} {'est. RAM MB':>11} {'p50 ms':>8} {'p95 ms':>8} {'recall@k':>9}")
+    for mode in args.modes.split(","):
+        s = replace(rag.SETTINGS, quantization=mode, quantization_always_ram=args.always_ram,
+                    vectors_on_disk=args.on_disk, hybrid_mode="boost",
+                    quant_oversampling=args.oversampling, quant_rescore=not args.no_rescore)
+        name = f"bench_quant_{mode}"
+        if client.collection_exists(name):
+            client.delete_collection(name)
+        rag.create_rag_collection(client, s, dim, name)
+        # Build HNSW + quantized storage even for a small corpus
+        client.update_collection(name, optimizer_config=OptimizersConfigDiff(indexing_threshold=1))
+        for start in range(0, n, 256):
+            batch = vectors[start:start + 256]
+            client.upsert(name, [PointStruct(id=start + i, vector=v.tolist(), payload={}) for i, v in enumerate(batch)], wait=True)
+        while client.get_collection(name).status != CollectionStatus.GREEN:
+            time.sleep(0.5)
+
+        latencies, hits = [], 0
+        for q in queries:
+            exact = client.query_points(name, query=q, limit=args.k, search_params=rag.search_params(s, exact=True)).points
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                approx = client.query_points(name, query=q, limit=args.k, search_params=rag.search_params(s)).points
+                latencies.append(time.perf_counter() - t0)
+            hits += len({p.id for p in exact} & {p.id for p in approx})
+        p50, p95 = latency_summary(latencies)
+        recall = hits / (len(queries) * args.k)
+        print(f"{mode:>8} {index_ram_bytes(s, n, dim) / 2**20:>11.1f} {p50:>8.2f} {p95:>8.2f} {recall:>9.3f}")
+        client.delete_collection(name)
+
+
+def latency_summary(latencies):
+    """(p50, p95) in milliseconds"""
+    latencies = sorted(latencies)
+    p50 = latencies[len(latencies) // 2] * 1000
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000
+    return p50, p95
+
+
+def bench_transport(args):
+    """Query latency of a new REST client per call vs the shared REST and gRPC clients"""
+    from concurrent.futures import ThreadPoolExecutor
+    import numpy as np
+    from qdrant_client import QdrantClient
+    from qdrant_client.models import Distance, PointStruct, VectorParams
+    from src.rag_or_search.tools.RAG_qdrant_new.qdrant_clients import get_client
+
+    name = "bench_transport"
+    rng = np.random.default_rng(0)
+    setup = get_client(url=args.url, prefer_grpc=False)
+    if setup.collection_exists(name):
+        setup.delete_collection(name)
+    setup.create_collection(name, vectors_config=VectorParams(size=args.dim, distance=Distance.COSINE))
+    vectors = rng.normal(size=(args.points, args.dim)).astype(np.float32)
+    for start in range(0, args.points, 256):
+        setup.upsert(name, [PointStruct(id=start + i, vector=v.tolist()) for i, v in enumerate(vectors[start:start + 256])], wait=True)
+    queries = rng.normal(size=(args.queries, args.dim)).tolist()
+
+    clients = {
+        "rest, new client per call": lambda: QdrantClient(url=args.url, timeout=30),
+        "rest, shared pooled": lambda: get_client(url=args.url, prefer_grpc=False),
+        "grpc, shared pooled": lambda: get_client(url=args.url, prefer_grpc=True),
+    }
+    print(f"{args.points} points x {args.dim}, {args.queries} queries, k=10")
+    print(f"{'transport':>27} {'threads':>8} {'p50 ms':>8} {'p95 ms':>8} {'qps':>8}")
+    for threads in [int(t) for t in args.threads.split(",")]:
+        for label, make_client in clients.items():
+            make_client().query_points(name, query=queries[0], limit=10)  # connect/warm up
+
+            def one(q):
+                t0 = time.perf_counter()
+                make_client().query_points(name, query=q, limit=10)
+                return time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                latencies = list(pool.map(one, queries))
+            wall = time.perf_counter() - t0
+            p50, p95 = latency_summary(latencies)
+            print(f"{label:>27} {threads:>8} {p50:>8.2f} {p95:>8.2f} {len(queries) / wall:>8.0f}")
+    setup.delete_collection(name)
+
+
+def mmr_select_loop(query_vec, candidates_vecs, k, lambda_mult):
+    """The original pure-Python MMR, kept as the reference for ``bench_mmr``"""
+    import numpy as np
+    V = np.array(candidates_vecs, dtype=float)
+    q = np.array(query_vec, dtype=float)
+    def cos(a, b):
+        na = (a @ a) ** 0.5 + 1e-12
+        nb = (b @ b) ** 0.5 + 1e-12
+        return float((a @ b) / (na * nb))
+    sims = [cos(v, q) for v in V]
+    selected = []
+    remaining = set(range(len(V)))
+    while len(selected) < min(k, len(V)):
+        if not selected:
+            best = max(remaining, key=lambda i: sims[i])
+            selected.append(best)
+            remaining.remove(best)
+            continue
+        best_idx, best_score = None, -1e9
+        for i in remaining:
+            max_div = max([cos(V[i], V[j]) for j in selected])
+            score = lambda_mult * sims[i] - (1 - lambda_mult) * max_div
+            if score > best_score:
+                best_score, best_idx = score, i
+        selected.append(best_idx)
+        remaining.remove(best_idx)
+    return selected
+
+
+def bench_mmr(args):
+    """Time the vectorized ``mmr_select`` against the loop version and check they pick the same items"""
+    import numpy as np
+    from src.rag_or_search.tools.RAG_qdrant_new.rag_qdrant_hybrid import mmr_select
+
+    rng = np.random.default_rng(0)
+    # "numpy ms" includes converting the Qdrant vector lists; "core ms" starts from arrays
+    print(f"{'n':>6} {'loop ms':>9} {'numpy ms':>9} {'core ms':>8} {'speed-up':>9} {'same':>5}")
+    for n in [int(x) for x in args.sizes.split(",")]:
+        # Clustered candidates, like real top-n hits for one query
+        base = rng.normal(size=args.dim)
+        vecs = (base + rng.normal(scale=0.8, size=(n, args.dim))).tolist()
+        q = (base + rng.normal(scale=0.5, size=args.dim)).tolist()
+        t0 = time.perf_counter()
+        ref = mmr_select_loop(q, vecs, args.k, 0.6)
+        loop = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            got = mmr_select(q, vecs, args.k, 0.6)
+        vec = (time.perf_counter() - t0) / args.repeat
+        q_arr, vecs_arr = np.asarray(q), np.asarray(vecs)
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            mmr_select(q_arr, vecs_arr, args.k, 0.6)
+        core = (time.perf_counter() - t0) / args.repeat
+        print(f"{n:>6} {loop * 1000:>9.2f} {vec * 1000:>9.2f} {core * 1000:>8.2f} {loop / vec:>8.1f}x {str(ref == got):>5}")
+
+
+def bench_batch(args):
+    """Throughput of one ``search`` per query vs ``search_many`` over the same question set"""
+    from dataclasses import replace
+    from src.rag_or_search.tools.RAG_qdrant_new import rag_qdrant_hybrid as rag
+
+    # Embedding and result caches off, so both runs pay for every query
+    s = replace(rag.SETTINGS, use_cache=False, query_cache_size=0, result_cache_size=0, search_batch_size=args.batch_size)
+    engine = rag.RagEngine(s).ensure_ready()
+    pool = QUESTIONS + [q for q, _ in LABELED_QUESTIONS]
+    queries = [pool[i % len(pool)] for i in range(args.queries)]
+
+    t0 = time.perf_counter()
+    single = [engine.search(q) for q in queries]
+    loop = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    batched = engine.search_many(queries)
+    many = time.perf_counter() - t0
+
+    same = sum([p.id for p in a] == [p.id for p in b] for a, b in zip(single, batched))
+    print("=" * 60)
+    print(f"mode {engine.settings.hybrid_mode}, {len(queries)} queries, batch size {args.batch_size}")
+    print(f"per-query search : {loop:8.2f} s  ({len(queries) / loop:7.1f} q/s)")
+    print(f"search_many      : {many:8.2f} s  ({len(queries) / many:7.1f} q/s)")
+    print(f"speed-up         : {loop / many:8.1f}x")
+    print(f"same results     : {same}/{len(queries)}")
+    print("=" * 60)
+
+
+def main():
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="mode", required=True)
+
+    p = sub.add_parser("warm", help="cold vs warm search_rag latency")
+    p.add_argument("--runs", type=int, default=10)
+    p.set_defaults(func=bench_warm)
+
+    p = sub.add_parser("parse", help="PDF parsing speed-up vs worker count")
+    p.add_argument("--workers", default="1,2,4,8")
+    p.add_argument("--pages-per-task", type=int, default=8)
+    p.add_argument("--pdf", default=PDF_PATH)
+    p.set_defaults(func=bench_parse)
+
+    p = sub.add_parser("dedup", help="index shrink from near-duplicate chunk removal")
+    p.add_argument("--thresholds", default="0.8,0.9,0.95")
+    p.add_argument("--pdf", default=PDF_PATH)
+    p.set_defaults(func=bench_dedup)
+
+    p = sub.add_parser("chunking", help="recursive vs legal chunker")
+    p.add_argument("--search", action="store_true", help="also embed both variants and measure context tokens and recall")
+    p.add_argument("--lexical", action="store_true", help="measure context tokens and recall with BM25 instead of embeddings")
+    p.add_argument("--k", type=int, default=6)
+    p.add_argument("--legal-k", type=int, default=0, help="results per query for the legal chunker (default: --k)")
+    p.add_argument("--chunk-tokens", type=int, default=0, help="legal chunker token budget (default: Settings.chunk_tokens)")
+    p.add_argument("--pdf", default=PDF_PATH)
+    p.set_defaults(func=bench_chunking)
+
+    p = sub.add_parser("quant", help="estimated RAM / latency / recall@k per quantization mode")
+    p.add_argument("--modes", default="none,scalar,binary,product")
+    p.add_argument("--location", default="http://localhost:6333", help="Qdrant URL (':memory:' ignores quantization)")
+    p.add_argument("--synthetic", type=int, default=0, help="use N random vectors instead of embedding the PDF")
+    p.add_argument("--dim", type=int, default=1536)
+    p.add_argument("--queries", type=int, default=50)
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--k", type=int, default=10)
+    p.add_argument("--oversampling", type=float, default=2.0)
+    p.add_argument("--no-rescore", action="store_true")
+    p.add_argument("--always-ram", action="store_true")
+    p.add_argument("--on-disk", action="store_true", help="memmap the original vectors (vectors_on_disk)")
+    p.add_argument("--pdf", default=PDF_PATH)
+    p.set_defaults(func=bench_quant)
+
+    p = sub.add_parser("transport", help="REST vs gRPC query latency (needs a Qdrant server)")
+    p.add_argument("--url", default="http://localhost:6333")
+    p.add_argument("--points", type=int, default=5000)
+    p.add_argument("--dim", type=int, default=1536)
+    p.add_argument("--queries", type=int, default=500)
+    p.add_argument("--threads", default="1,8")
+    p.set_defaults(func=bench_transport)
+
+    p = sub.add_parser("mmr", help="vectorized vs loop MMR selection")
+    p.add_argument("--sizes", default="30,100,300,1000")
+    p.add_argument("--dim", type=int, default=1536)
+    p.add_argument("--k", type=int, default=6)
+    p.add_argument("--repeat", type=int, default=20)
+    p.set_defaults(func=bench_mmr)
+
+    p = sub.add_parser("batch", help="per-query search vs search_many throughput")
+    p.add_argument("--queries", type=int, default=200)
+    p.add_argument("--batch-size", type=int, default=64)
+    p.set_defaults(func=bench_batch)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
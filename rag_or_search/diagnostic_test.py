@@ -44,8 +44,9 @@ def test_pdf_file():
 def test_qdrant_connection():
     """Test connessione a Qdrant"""
     try:
-        from qdrant_client import QdrantClient
-        client = QdrantClient(url="http://localhost:6333", timeout=5)
+        from src.rag_or_search.tools.RAG_qdrant_new.rag_qdrant_hybrid import SETTINGS, get_qdrant_client
+        # QDRANT_PATH=":memory:" (or a folder) checks the embedded mode instead of a server
+        client = get_qdrant_client(SETTINGS)
         
         # Test connessione
         collections = client.get_collections()
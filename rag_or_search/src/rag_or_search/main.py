@@ -4,7 +4,8 @@
 This module defines a CrewAI Flow that routes a user request to one of three
 tools: a RAG pipeline, a web search pipeline, or a math pipeline. The flow
 validates the input for safety, classifies the request, runs the appropriate
-branch, and can produce an explanation.
+branch, and can produce an explanation. Paraphrases of earlier requests are
+answered from a semantic answer cache without running any crew.
 
 Notes
 -----
@@ -23,9 +24,27 @@ from src.rag_or_search.crews.mathcrew.mathcrew import Mathcrew
 from src.rag_or_search.crews.teachercrew.teachercrew import Teachercrew
 from src.rag_or_search.crews.imagecrew.imagecrew import ImageCrew
 from src.rag_or_search.crews.aiactcrew.aiactcrew import Aiactcrew
+from src.rag_or_search.tools.RAG_qdrant_new.rag_qdrant_hybrid import (
+    CURRENT_DIRECTORY_PATH,
+    SETTINGS,
+    get_answer_cache,
+    get_shared_embeddings,
+    kb_version,
+)
 
 os.environ["CREWAI_TELEMETRY_DISABLED"] = "1"
 
+KB_DIR = os.path.join(CURRENT_DIRECTORY_PATH, SETTINGS.kb_dir)
+
+
+def format_age(seconds: float) -> str:
+    """Human-readable age of a cached answer (e.g. ``"5 min"``, ``"3 h"``)."""
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} min"
+    if seconds < 86400:
+        return f"{seconds / 3600:.0f} h"
+    return f"{seconds / 86400:.0f} d"
+
 class RAGSearchState(BaseModel):
     """Shared state for the RAG-or-Search flow.
 
@@ -34,22 +53,29 @@ class RAGSearchState(BaseModel):
     request : str
         The user-provided query or problem statement.
     tool : str
-        The selected tool label, one of {"RAG", "web", "math"}.
+        The selected tool label, one of {"RAG", "web", "math", "cached"}.
     result : str
         The aggregated result string produced by the executed branch.
+    request_vector : list of float
+        Embedding of the request, used for the semantic answer cache.
+    answer_age : float
+        Age in seconds of the cached answer when the "cached" route is taken.
     """
 
     request: str = ""
-    tool: str = ""  # "RAG" or "web"
+    tool: str = ""  # "RAG", "web", "math" or "cached"
     result: str = ""
     input: int = 0
+    request_vector: list[float] = []
+    answer_age: float = 0.0
 
 
 class RAGSearchFlow(Flow[RAGSearchState]):
     """Flow that validates, classifies, routes, and explains a user request.
 
     The flow performs the following steps:
-    1. Collect a request and validate it for safety.
+    1. Collect a request; answer it from the semantic cache if an earlier
+       request was close enough, otherwise validate it for safety.
     2. Classify the request into one of RAG, web, or math.
     3. Execute the selected branch.
     4. When RAG or web is selected, explain the result using a teaching agent.
@@ -110,6 +136,9 @@ class RAGSearchFlow(Flow[RAGSearchState]):
         while True:
             self.state.request = input("Enter your request: ")
 
+            if self.find_cached_answer():
+                return self.state.request
+
             messages = [
                 {
                     "role": "system",
@@ -162,6 +191,55 @@ class RAGSearchFlow(Flow[RAGSearchState]):
 
         return self.state.request
     
+    def find_cached_answer(self) -> bool:
+        """Look the request up in the semantic answer cache.
+
+        Embeds the request with the shared embeddings (the vector is kept in
+        the state so the answer can be stored under it later) and, on a hit,
+        selects the "cached" route with the stored answer. The cache is only
+        a shortcut: if the embedding or the lookup fails, the request takes
+        the normal route.
+
+        Returns
+        -------
+        bool
+            True if a stored answer will be used.
+        """
+        try:
+            cache = get_answer_cache(SETTINGS)
+            if cache is None:
+                return False
+            self.state.request_vector = get_shared_embeddings(SETTINGS).embed_query(self.state.request)
+            hit = cache.lookup(self.state.request_vector, kb_version(KB_DIR))
+        except Exception as e:
+            print(f"Answer cache unavailable: {e}")
+            self.state.request_vector = []
+            return False
+        if hit is None:
+            return False
+        print(f"Similar request answered {format_age(hit.age)} ago: '{hit.request}' (similarity {hit.similarity:.2f})")
+        self.state.tool = "cached"
+        self.state.result = hit.answer
+        self.state.answer_age = hit.age
+        return True
+
+    def store_answer(self):
+        """Store the branch result in the semantic answer cache.
+
+        RAG answers are tied to the current knowledge-base version and are
+        dropped when the knowledge base is re-ingested; web answers only
+        expire with age.
+        """
+        cache = get_answer_cache(SETTINGS)
+        if cache is None or not self.state.request_vector:
+            return
+        version = kb_version(KB_DIR) if self.state.tool == "RAG" else None
+        answer = getattr(self.state.result, "raw", self.state.result)
+        try:
+            cache.store(self.state.request, self.state.request_vector, answer, self.state.tool, version)
+        except Exception as e:
+            print(f"Answer not cached: {e}")
+
     @listen("ai_act")
     def generate_ai_act(self):
         """Generate an AI Act compliance report for the flow."""
@@ -182,8 +260,8 @@ class RAGSearchFlow(Flow[RAGSearchState]):
         Returns
         -------
         str or None
-            One of {"RAG", "web", "math"} which controls the next node, or None
-            if no valid tool is selected.
+            One of {"RAG", "web", "math", "cached"} which controls the next node,
+            or None if no valid tool is selected.
 
         Examples
         --------
@@ -202,8 +280,37 @@ class RAGSearchFlow(Flow[RAGSearchState]):
         if self.state.tool == "math":
             print("Math selected to answer your query")
             return "math"
+        if self.state.tool == "cached":
+            print("Cached answer selected to answer your query")
+            return "cached"
         return None
 
+    @listen("cached")
+    def answer_from_cache(self):
+        """Return the stored answer of a similar earlier request.
+
+        Skips the safety check, classification and every crew: the answer was
+        produced by the full flow for a request above the cache similarity
+        threshold.
+
+        Returns
+        -------
+        str
+            The cached answer.
+
+        Examples
+        --------
+        >>> flow = RAGSearchFlow()
+        >>> flow.state.result = "Providers must run a conformity assessment."
+        >>> flow.state.answer_age = 7200
+        >>> result = flow.answer_from_cache()
+        Cached answer (2 h old):
+        Providers must run a conformity assessment.
+        """
+        print(f"Cached answer ({format_age(self.state.answer_age)} old):")
+        print(self.state.result)
+        return self.state.result
+
 
     @listen("RAG")
     def query_rag(self):
@@ -266,6 +373,7 @@ class RAGSearchFlow(Flow[RAGSearchState]):
             self.state.result = result.raw + "\n\n" + self.state.result.raw
         else:
             self.state.result = result
+        self.store_answer()
 
         return self.state.result
 
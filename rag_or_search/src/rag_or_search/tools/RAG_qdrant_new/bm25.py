@@ -0,0 +1,227 @@
+"""
+BM25 sparse vectors for Qdrant
+
+Chunks are turned into sparse vectors of BM25 term-frequency weights at
+ingestion; the IDF factor is applied by Qdrant at query time
+(``Modifier.IDF`` on the sparse vector config), so adding or removing
+documents never requires re-weighting stored vectors. Terms are mapped to
+sparse indices by hashing, so no vocabulary has to be stored or shared.
+Document length is normalised against a fixed ``avg_len`` because the
+corpus average is not known while streaming.
+
+``Bm25Index`` is an in-process alternative for the lexical channel: a
+compact inverted index over the same tokens, scored with full BM25.
+"""
+
+from __future__ import annotations
+import os
+import re
+import threading
+import zlib
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from qdrant_client.models import SparseVector
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens (single characters dropped)"""
+    return [t for t in _WORD_RE.findall(text.lower()) if len(t) > 1]
+
+
+def term_id(term: str) -> int:
+    """Sparse index of ``term`` (31-bit crc32 hash)"""
+    return zlib.crc32(term.encode("utf-8")) & 0x7FFFFFFF
+
+
+def bm25_document_vector(text: str, k1: float = 1.2, b: float = 0.75, avg_len: float = 256.0) -> SparseVector:
+    """BM25 term-frequency weights of a document; IDF is left to Qdrant"""
+    tokens = tokenize(text)
+    norm = k1 * (1 - b + b * len(tokens) / avg_len)
+    weights = {}
+    for term, tf in Counter(tokens).items():
+        idx = term_id(term)
+        # crc32 collisions are rare; merge them instead of sending duplicate indices
+        weights[idx] = weights.get(idx, 0.0) + tf * (k1 + 1) / (tf + norm)
+    return SparseVector(indices=list(weights), values=list(weights.values()))
+
+
+def bm25_query_vector(text: str) -> SparseVector:
+    """Query vector: weight 1 per distinct term, so the score is the sum of matched BM25 weights x IDF"""
+    ids = sorted({term_id(t) for t in tokenize(text)})
+    return SparseVector(indices=ids, values=[1.0] * len(ids))
+
+
+class Bm25Index:
+    """In-process BM25 inverted index over chunk texts, keyed by point id.
+
+    Postings are per-term ``array`` pairs (internal doc numbers, term
+    frequencies) that grow by appending, so adding a chunk is O(its terms).
+    Deleting a chunk only marks its doc number dead; dead postings are
+    skipped when scoring and dropped by ``compact``, which runs by itself
+    once a quarter of the doc numbers are dead. Scoring a query touches only
+    the postings of its terms and is vectorized with NumPy.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self._postings: Dict[int, Tuple[array, array]] = {}
+        self._doc_of: Dict[str, int] = {}       # point id -> doc number
+        self._ids: List[str | None] = []        # doc number -> point id (None = deleted)
+        self._lengths = array("I")
+        self._alive = bytearray()
+        self._total_len = 0
+        self._dead = 0
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def __len__(self) -> int:
+        return len(self._doc_of)
+
+    def __contains__(self, pid) -> bool:
+        return str(pid) in self._doc_of
+
+    def add(self, pid, text: str):
+        """Index ``text`` under point id ``pid`` (re-adding an id replaces it)"""
+        pid = str(pid)
+        tokens = tokenize(text)
+        with self._lock:
+            if pid in self._doc_of:
+                self._delete(pid)
+            doc = len(self._ids)
+            self._doc_of[pid] = doc
+            self._ids.append(pid)
+            self._lengths.append(len(tokens))
+            self._alive.append(1)
+            self._total_len += len(tokens)
+            for term, tf in Counter(term_id(t) for t in tokens).items():
+                docs, tfs = self._postings.setdefault(term, (array("I"), array("I")))
+                docs.append(doc)
+                tfs.append(tf)
+
+    def _delete(self, pid: str):
+        doc = self._doc_of.pop(pid)
+        self._ids[doc] = None
+        self._alive[doc] = 0
+        self._total_len -= self._lengths[doc]
+        self._dead += 1
+
+    def delete(self, pids: Iterable):
+        """Remove point ids from the index (unknown ids are ignored)"""
+        with self._lock:
+            for pid in pids:
+                if str(pid) in self._doc_of:
+                    self._delete(str(pid))
+            if self._dead > 1000 and self._dead * 4 > len(self._ids):
+                self._compact()
+
+    def compact(self):
+        """Renumber live docs and drop dead postings"""
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        alive = np.frombuffer(bytes(self._alive), dtype=np.uint8).astype(bool)
+        renumber = np.cumsum(alive) - 1
+        postings = {}
+        for term, (docs, tfs) in self._postings.items():
+            d = np.frombuffer(docs, dtype=np.uint32)
+            keep = alive[d]
+            if keep.any():
+                postings[term] = (array("I", renumber[d[keep]].astype(np.uint32).tobytes()),
+                                  array("I", np.frombuffer(tfs, dtype=np.uint32)[keep].tobytes()))
+        self._postings = postings
+        self._ids = [pid for pid in self._ids if pid is not None]
+        self._doc_of = {pid: i for i, pid in enumerate(self._ids)}
+        self._lengths = array("I", np.frombuffer(self._lengths, dtype=np.uint32)[alive].tobytes())
+        self._alive = bytearray(b"\x01" * len(self._ids))
+        self._dead = 0
+
+    def _scores(self, query: str) -> np.ndarray:
+        """BM25 score of every doc number for ``query`` (dead docs score 0)"""
+        n_docs = len(self._doc_of)
+        scores = np.zeros(len(self._ids), dtype=np.float64)
+        if not n_docs:
+            return scores
+        alive = np.frombuffer(self._alive, dtype=np.uint8)
+        lengths = np.frombuffer(self._lengths, dtype=np.uint32)
+        avg_len = self._total_len / n_docs or 1.0
+        for term in {term_id(t) for t in tokenize(query)}:
+            if term not in self._postings:
+                continue
+            docs_a, tfs_a = self._postings[term]
+            docs = np.frombuffer(docs_a, dtype=np.uint32)
+            live = alive[docs].astype(bool)
+            docs = docs[live]
+            if not len(docs):
+                continue
+            tfs = np.frombuffer(tfs_a, dtype=np.uint32)[live].astype(np.float64)
+            idf = np.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * lengths[docs] / avg_len)
+            scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + norm)
+        return scores
+
+    def score(self, query: str, pids: Iterable) -> Dict[str, float]:
+        """BM25 scores of the given point ids (ids without a match are left out)"""
+        with self._lock:
+            scores = self._scores(query)
+            out = {}
+            for pid in pids:
+                doc = self._doc_of.get(str(pid))
+                if doc is not None and scores[doc] > 0:
+                    out[str(pid)] = float(scores[doc])
+        return out
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """Top ``k`` ``(point id, score)`` of the whole index"""
+        with self._lock:
+            scores = self._scores(query)
+            k = min(k, int(np.count_nonzero(scores)))
+            if not k:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [(self._ids[i], float(scores[i])) for i in top]
+
+    def save(self, path: str):
+        """Write the index to ``path`` (compacted, NumPy ``.npz``)"""
+        with self._lock:
+            self._compact()
+            terms = np.fromiter(self._postings, dtype=np.uint32, count=len(self._postings))
+            sizes = np.fromiter((len(self._postings[t][0]) for t in terms), dtype=np.int64, count=len(terms))
+            docs = np.frombuffer(b"".join(self._postings[t][0].tobytes() for t in terms), dtype=np.uint32)
+            tfs = np.frombuffer(b"".join(self._postings[t][1].tobytes() for t in terms), dtype=np.uint32)
+            tmp = path + ".tmp.npz"
+            np.savez(tmp, terms=terms, offsets=np.concatenate([[0], np.cumsum(sizes)]), docs=docs, tfs=tfs,
+                     ids=np.array(self._ids, dtype=str), lengths=np.frombuffer(self._lengths, dtype=np.uint32))
+            os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, k1: float = 1.2, b: float = 0.75) -> "Bm25Index":
+        """Load an index written by ``save``; a missing or unreadable file gives an empty index"""
+        index = cls(k1, b)
+        try:
+            data = np.load(path)
+        except (OSError, ValueError):
+            return index
+        offsets, docs, tfs = data["offsets"], data["docs"], data["tfs"]
+        for i, term in enumerate(data["terms"].tolist()):
+            lo, hi = offsets[i], offsets[i + 1]
+            index._postings[term] = (array("I", docs[lo:hi].tobytes()), array("I", tfs[lo:hi].tobytes()))
+        index._ids = data["ids"].tolist()
+        index._doc_of = {pid: i for i, pid in enumerate(index._ids)}
+        index._lengths = array("I", data["lengths"].astype(np.uint32).tobytes())
+        index._alive = bytearray(b"\x01" * len(index._ids))
+        index._total_len = int(data["lengths"].sum())
+        return index
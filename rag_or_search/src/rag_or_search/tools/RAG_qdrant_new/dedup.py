@@ -0,0 +1,77 @@
+"""
+Near-duplicate detection for chunks with MinHash + LSH
+
+Each text is reduced to a MinHash signature over word shingles; signatures
+are split into bands and bucketed, so a new text is only compared with
+earlier texts that share at least one band. A candidate counts as a
+duplicate when the estimated Jaccard similarity reaches ``threshold``.
+"""
+
+from __future__ import annotations
+import re
+import zlib
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+# Largest prime below 2^32: with x, a, b < p, a*x + b < p^2 fits in uint64
+_PRIME = (1 << 32) - 5
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def lsh_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """Pick (bands, rows) with bands*rows == num_perm whose S-curve midpoint is closest to ``threshold``"""
+    best = (num_perm, 1)
+    best_err = float("inf")
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        err = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+        if err < best_err:
+            best, best_err = (bands, rows), err
+    return best
+
+
+class NearDuplicateFilter:
+    """Streaming MinHash/LSH filter: remembers kept texts and flags near-duplicates of them"""
+
+    def __init__(self, threshold: float = 0.9, num_perm: int = 64, shingle_size: int = 5, seed: int = 1):
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.bands, self.rows = lsh_bands(threshold, num_perm)
+        rng = np.random.default_rng(seed)
+        # Universal hash family h(x) = (a*x + b) mod p over the whole field
+        self._a = rng.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+        self._buckets: List[Dict[bytes, List[Hashable]]] = [{} for _ in range(self.bands)]
+        self._signatures: Dict[Hashable, np.ndarray] = {}
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of the word shingles of ``text``"""
+        words = _WORD_RE.findall(text.lower())
+        k = self.shingle_size
+        shingles = {" ".join(words[i:i + k]) for i in range(max(1, len(words) - k + 1))}
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) % _PRIME for s in shingles), dtype=np.uint64, count=len(shingles))
+        perm = (np.outer(hashes, self._a) + self._b) % np.uint64(_PRIME)
+        return perm.min(axis=0)
+
+    def _band_keys(self, sig: np.ndarray) -> List[bytes]:
+        return [sig[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def check(self, key: Hashable, text: str) -> Optional[Hashable]:
+        """Return the key of a kept near-duplicate of ``text``, or keep ``text`` under ``key`` and return ``None``"""
+        sig = self.signature(text)
+        band_keys = self._band_keys(sig)
+        seen = set()
+        for band, bkey in zip(self._buckets, band_keys):
+            for other in band.get(bkey, ()):
+                if other in seen:
+                    continue
+                seen.add(other)
+                if float(np.mean(self._signatures[other] == sig)) >= self.threshold:
+                    return other
+        self._signatures[key] = sig
+        for band, bkey in zip(self._buckets, band_keys):
+            band.setdefault(bkey, []).append(key)
+        return None
@@ -0,0 +1,93 @@
+"""
+Local chunk-text store backed by SQLite
+
+Keeps chunk texts out of the Qdrant payloads: texts are stored here as
+zlib-compressed blobs keyed by point id, and Qdrant only holds vectors and
+small filterable fields. Point ids are content-addressed, so one store can
+serve every versioned collection behind the alias.
+"""
+
+from __future__ import annotations
+import re
+import sqlite3
+import threading
+import zlib
+from typing import Dict, Iterable, List, Tuple
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def text_tokens(text: str) -> set:
+    """Lower-cased word tokens, as Qdrant's ``word`` tokenizer produces them"""
+    return set(_WORD_RE.findall(text.lower()))
+
+
+def matches_text(query: str, text: str) -> bool:
+    """Local equivalent of a ``MatchText`` condition: every query token occurs in ``text``"""
+    return text_tokens(query) <= text_tokens(text)
+
+
+class DocStore:
+    """SQLite table ``point id -> compressed chunk text``"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS chunks (id TEXT PRIMARY KEY, text BLOB NOT NULL)")
+        self._conn.commit()
+
+    def put_many(self, items: Iterable[Tuple[str, str]]):
+        """Store ``(point_id, text)`` pairs"""
+        rows = [(str(pid), zlib.compress(text.encode("utf-8"))) for pid, text in items]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO chunks VALUES (?, ?)", rows)
+            self._conn.commit()
+
+    def get_many(self, ids: Iterable) -> Dict[str, str]:
+        """Texts of the stored ``ids`` (missing ids are left out)"""
+        keys = [str(i) for i in ids]
+        found: Dict[str, str] = {}
+        with self._lock:
+            # SQLite caps bound parameters, so look keys up in slices
+            for i in range(0, len(keys), 500):
+                part = keys[i:i + 500]
+                marks = ",".join("?" * len(part))
+                rows = self._conn.execute(f"SELECT id, text FROM chunks WHERE id IN ({marks})", part).fetchall()
+                found.update((pid, zlib.decompress(blob).decode("utf-8")) for pid, blob in rows)
+        return found
+
+    def existing(self, ids: Iterable) -> set:
+        """The subset of ``ids`` that has a stored text"""
+        keys = [str(i) for i in ids]
+        found: set = set()
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                part = keys[i:i + 500]
+                marks = ",".join("?" * len(part))
+                found.update(row[0] for row in self._conn.execute(f"SELECT id FROM chunks WHERE id IN ({marks})", part))
+        return found
+
+    def delete_many(self, ids: Iterable) -> int:
+        """Delete the texts of ``ids``; return how many were stored"""
+        rows = [(str(i),) for i in ids]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany("DELETE FROM chunks WHERE id = ?", rows)
+            self._conn.commit()
+            return self._conn.total_changes - before
+
+    def prune(self, keep: set) -> int:
+        """Delete every text whose id is not in ``keep``; return how many were deleted"""
+        with self._lock:
+            stored = [row[0] for row in self._conn.execute("SELECT id FROM chunks")]
+            stale: List[Tuple[str]] = [(pid,) for pid in stored if pid not in keep]
+            self._conn.executemany("DELETE FROM chunks WHERE id = ?", stale)
+            self._conn.commit()
+        return len(stale)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
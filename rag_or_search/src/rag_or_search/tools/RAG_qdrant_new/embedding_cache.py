@@ -0,0 +1,194 @@
+"""
+Persistent embedding cache backed by SQLite
+
+Vectors are keyed by (embedding model, sha256 of the text) and stored as
+raw float32 blobs. The cache is capped by ``max_entries`` and evicts the
+least recently used rows once the cap is exceeded. The row count lives in
+a ``meta`` row kept up to date by triggers, so the cap holds when several
+processes share the file and no insert has to scan the table.
+"""
+
+from __future__ import annotations
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+try:
+    from .ttl_cache import TTLCache
+except ImportError:
+    from ttl_cache import TTLCache
+
+
+def text_hash(text: str) -> str:
+    """sha256 hex digest of a text"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """SQLite store of float32 vectors with LRU eviction and hit/miss counters"""
+
+    def __init__(self, path: str, max_entries: int = 200_000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL,"
+            " text_hash TEXT NOT NULL,"
+            " vec BLOB NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " PRIMARY KEY (model, text_hash))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings(last_used)")
+        self._conn.commit()
+        self._conn.execute("BEGIN IMMEDIATE")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        # Counted once for a file created before the triggers; the triggers keep it exact from then on
+        self._conn.execute("INSERT OR IGNORE INTO meta SELECT 'count', COUNT(*) FROM embeddings")
+        self._conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS embeddings_count_insert AFTER INSERT ON embeddings "
+            "BEGIN UPDATE meta SET value = value + 1 WHERE key = 'count'; END"
+        )
+        self._conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS embeddings_count_delete AFTER DELETE ON embeddings "
+            "BEGIN UPDATE meta SET value = value - 1 WHERE key = 'count'; END"
+        )
+        self._conn.commit()
+
+    def _count(self) -> int:
+        return self._conn.execute("SELECT value FROM meta WHERE key = 'count'").fetchone()[0]
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """Return cached vectors for ``texts`` (``None`` where missing)"""
+        keys = [text_hash(t) for t in texts]
+        found: Dict[str, bytes] = {}
+        with self._lock:
+            # SQLite caps bound parameters, so look keys up in slices
+            for i in range(0, len(keys), 500):
+                part = keys[i:i + 500]
+                marks = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vec FROM embeddings WHERE model = ? AND text_hash IN ({marks})",
+                    [model, *part],
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                    [(now, model, k) for k in found],
+                )
+                self._conn.commit()
+            out = [np.frombuffer(found[k], dtype=np.float32).tolist() if k in found else None for k in keys]
+            hit = sum(v is not None for v in out)
+            self.hits += hit
+            self.misses += len(out) - hit
+        return out
+
+    def put_many(self, model: str, texts: List[str], vecs: List[List[float]]):
+        """Store vectors for ``texts`` and evict the oldest rows above the cap"""
+        now = time.time()
+        rows = [
+            (model, text_hash(t), np.asarray(v, dtype=np.float32).tobytes(), now)
+            for t, v in zip(texts, vecs)
+        ]
+        with self._lock:
+            # One write transaction: other processes cannot insert between the count and the eviction
+            self._conn.execute("BEGIN IMMEDIATE")
+            # An upsert, not INSERT OR REPLACE: replaced rows would not fire the delete trigger
+            self._conn.executemany(
+                "INSERT INTO embeddings VALUES (?, ?, ?, ?) ON CONFLICT (model, text_hash) "
+                "DO UPDATE SET vec = excluded.vec, last_used = excluded.last_used",
+                rows,
+            )
+            excess = self._count() - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE rowid IN "
+                    "(SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            entries = self._count()
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": entries,
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """LangChain ``Embeddings`` wrapper that serves vectors from an ``EmbeddingCache``"""
+
+    def __init__(self, inner: Embeddings, cache: EmbeddingCache, model_name: str):
+        self.inner = inner
+        self.cache = cache
+        self.model_name = model_name
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vecs = self.cache.get_many(self.model_name, texts)
+        miss = [i for i, v in enumerate(vecs) if v is None]
+        if miss:
+            # Embed each distinct missing text once
+            todo = list(dict.fromkeys(texts[i] for i in miss))
+            new = dict(zip(todo, self.inner.embed_documents(todo)))
+            self.cache.put_many(self.model_name, todo, [new[t] for t in todo])
+            for i in miss:
+                vecs[i] = new[texts[i]]
+        return vecs
+
+    def embed_query(self, text: str) -> List[float]:
+        vec = self.cache.get_many(self.model_name, [text])[0]
+        if vec is None:
+            vec = self.inner.embed_query(text)
+            self.cache.put_many(self.model_name, [text], [vec])
+        return vec
+
+
+class QueryCachedEmbeddings(Embeddings):
+    """LangChain ``Embeddings`` wrapper that keeps recent query vectors in an in-memory LRU with TTL.
+
+    Document embedding passes straight through. Stacked on ``CachedEmbeddings``
+    a query missing here is still served from the on-disk cache.
+    """
+
+    def __init__(self, inner: Embeddings, max_entries: int = 1024, ttl: float = 3600.0):
+        self.inner = inner
+        self.query_cache = TTLCache(max_entries=max_entries, ttl=ttl)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.inner.embed_documents(texts)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries with one ``embed_documents`` batch, serving cached ones from memory"""
+        vecs = [self.query_cache.get(t) for t in texts]
+        todo = list(dict.fromkeys(t for t, v in zip(texts, vecs) if v is None))
+        if todo:
+            new = dict(zip(todo, self.inner.embed_documents(todo)))
+            for t in todo:
+                self.query_cache.put(t, new[t])
+            vecs = [new[t] if v is None else v for t, v in zip(texts, vecs)]
+        return vecs
+
+    def embed_query(self, text: str) -> List[float]:
+        vec = self.query_cache.get(text)
+        if vec is None:
+            vec = self.inner.embed_query(text)
+            self.query_cache.put(text, vec)
+        return vec
@@ -0,0 +1,178 @@
+"""
+Concurrent, rate-limit-aware embedding scheduler
+
+Texts are grouped into batches by token count and embedded with several
+requests in flight. A token bucket per quota (tokens and requests per
+minute) paces the calls, and a 429 answer pauses every worker for the
+Retry-After interval sent by the server.
+"""
+
+from __future__ import annotations
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken missing or encoding not downloadable
+    _ENCODING = None
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count of ``text`` (tiktoken if available, else ~4 chars per token)"""
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def is_rate_limit_error(exc: Exception) -> bool:
+    """True for HTTP 429 / rate limit errors"""
+    status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    return status == 429 or "429" in str(exc) or "rate limit" in str(exc).lower()
+
+
+def retry_after_seconds(exc: Exception) -> Optional[float]:
+    """Delay requested by the server through ``retry-after-ms`` / ``retry-after`` headers"""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return float(value) * scale
+        except ValueError:
+            continue  # HTTP-date form, fall back to backoff
+    return None
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at ``rate_per_minute``"""
+
+    def __init__(self, rate_per_minute: float, burst_seconds: float = 10.0):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0):
+        """Block until ``amount`` tokens are available, then take them"""
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                wait = self.blocked_until - now
+                if wait <= 0:
+                    if self.tokens >= amount:
+                        self.tokens -= amount
+                        return
+                    wait = (amount - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def block_for(self, seconds: float):
+        """Hold every caller back for ``seconds`` (server-side Retry-After)"""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+
+def token_batches(texts: List[str], max_tokens: int, max_items: int) -> List[List[int]]:
+    """Group text indexes into batches of at most ``max_tokens`` / ``max_items``"""
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for i, text in enumerate(texts):
+        n = estimate_tokens(text)
+        if current and (current_tokens + n > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += n
+    if current:
+        batches.append(current)
+    return batches
+
+
+class ScheduledEmbeddings(Embeddings):
+    """``Embeddings`` wrapper that embeds token-sized batches concurrently under a quota"""
+
+    def __init__(
+        self,
+        inner: Embeddings,
+        concurrency: int = 4,
+        batch_tokens: int = 8000,
+        max_batch_size: int = 256,
+        tokens_per_minute: int = 240_000,
+        requests_per_minute: int = 1_440,
+        max_retries: int = 6,
+        base_delay: float = 2.0,
+    ):
+        self.inner = inner
+        self.concurrency = concurrency
+        self.batch_tokens = batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.stats: Dict[str, float] = {"texts": 0, "requests": 0, "retries": 0, "seconds": 0.0}
+        self._stats_lock = threading.Lock()
+
+    def _call(self, fn: Callable[[], List], tokens: int):
+        """Run one request under the quota, retrying rate-limit errors"""
+        for attempt in range(self.max_retries):
+            self.request_bucket.acquire(1)
+            self.token_bucket.acquire(tokens)
+            try:
+                result = fn()
+                with self._stats_lock:
+                    self.stats["requests"] += 1
+                return result
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.max_retries - 1:
+                    raise
+                delay = retry_after_seconds(e) or self.base_delay * (2 ** attempt)
+                print(f"Rate limit hit, pausing embeddings for {delay:.1f} seconds (retry {attempt + 1}/{self.max_retries})")
+                self.token_bucket.block_for(delay)
+                self.request_bucket.block_for(delay)
+                with self._stats_lock:
+                    self.stats["retries"] += 1
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        start = time.perf_counter()
+        batches = token_batches(texts, self.batch_tokens, self.max_batch_size)
+
+        def run(idx: List[int]) -> List[List[float]]:
+            batch = [texts[i] for i in idx]
+            tokens = sum(estimate_tokens(t) for t in batch)
+            return self._call(lambda: self.inner.embed_documents(batch), tokens)
+
+        vecs: List[List[float]] = [None] * len(texts)  # type: ignore[list-item]
+        if len(batches) == 1:
+            results = [run(batches[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                results = list(pool.map(run, batches))
+        for idx, batch_vecs in zip(batches, results):
+            for i, v in zip(idx, batch_vecs):
+                vecs[i] = v
+        with self._stats_lock:
+            self.stats["texts"] += len(texts)
+            self.stats["seconds"] += time.perf_counter() - start
+        return vecs
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._call(lambda: self.inner.embed_query(text), estimate_tokens(text))
+
+    def throughput(self) -> float:
+        """Texts embedded per second across all ``embed_documents`` calls"""
+        return self.stats["texts"] / self.stats["seconds"] if self.stats["seconds"] else 0.0
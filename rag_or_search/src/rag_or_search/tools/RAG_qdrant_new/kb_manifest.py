@@ -0,0 +1,93 @@
+"""
+Manifest of ingested knowledge-base files
+
+Records size, mtime and sha256 of every file that was ingested so a scan
+of the knowledge_base folder can tell which files were added, changed or
+removed since the last sync. Unchanged files are recognised from ``stat``
+alone; the content hash is only recomputed when size or mtime moved.
+"""
+
+from __future__ import annotations
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List
+
+try:
+    from .pdf_loader import file_sha256
+except ImportError:
+    from pdf_loader import file_sha256
+
+SUPPORTED_EXTENSIONS = (".pdf", ".md", ".markdown", ".html", ".htm")
+
+
+def scan_knowledge_base(kb_dir: str) -> Dict[str, str]:
+    """Map source name (path relative to ``kb_dir``) to absolute path for supported files"""
+    found: Dict[str, str] = {}
+    for p in sorted(Path(kb_dir).rglob("*")):
+        if p.is_file() and p.suffix.lower() in SUPPORTED_EXTENSIONS and not p.name.startswith("."):
+            found[p.relative_to(kb_dir).as_posix()] = str(p)
+    return found
+
+
+@dataclass
+class KbChanges:
+    """Result of comparing a folder scan with the manifest"""
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+
+class KbManifest:
+    """JSON manifest ``{source: {"size", "mtime", "sha256"}}`` of ingested files"""
+
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.entries: Dict[str, Dict] = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def reset(self):
+        self.entries = {}
+        self.save()
+
+    def diff(self, files: Dict[str, str]) -> KbChanges:
+        """Compare ``scan_knowledge_base`` output with the manifest"""
+        changes = KbChanges()
+        for source, path in files.items():
+            known = self.entries.get(source)
+            if known is None:
+                changes.added.append(source)
+                continue
+            st = os.stat(path)
+            if known["size"] == st.st_size and known["mtime"] == st.st_mtime:
+                continue
+            if file_sha256(path) == known["sha256"]:
+                # Touched but identical: only refresh the stat
+                self.entries[source].update(size=st.st_size, mtime=st.st_mtime)
+                continue
+            changes.changed.append(source)
+        changes.removed = [s for s in self.entries if s not in files]
+        return changes
+
+    def record(self, source: str, path: str):
+        """Mark ``source`` as ingested from its current file state"""
+        st = os.stat(path)
+        self.entries[source] = {"size": st.st_size, "mtime": st.st_mtime, "sha256": file_sha256(path)}
+        self.save()
+
+    def forget(self, source: str):
+        self.entries.pop(source, None)
+        self.save()
@@ -0,0 +1,32 @@
+"""
+Sync the knowledge_base folder into Qdrant
+
+Usage:
+    python kb_sync.py            # one incremental sync
+    python kb_sync.py --watch    # keep polling and re-ingest changed files
+    python kb_sync.py --reindex  # blue/green full rebuild behind the collection alias
+"""
+
+import argparse
+
+from rag_qdrant_hybrid import SETTINGS, RagEngine, reindex_collection, watch_knowledge_base
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incremental knowledge-base ingestion")
+    parser.add_argument("--kb-dir", default=None, help="knowledge-base folder (default: Settings.kb_dir)")
+    parser.add_argument("--watch", action="store_true", help="poll the folder and sync on changes")
+    parser.add_argument("--reindex", action="store_true", help="rebuild into a new collection and switch the alias")
+    parser.add_argument("--interval", type=float, default=SETTINGS.kb_poll_interval, help="seconds between scans")
+    args = parser.parse_args()
+
+    SETTINGS.kb_poll_interval = args.interval
+    SETTINGS.kb_sync_on_start = False  # synced explicitly below
+    engine = RagEngine(SETTINGS, kb_dir=args.kb_dir).ensure_ready()
+    if args.reindex:
+        # SETTINGS, not engine.settings: the engine may have fallen back to the old collection's mode
+        reindex_collection(engine.client, SETTINGS, engine.embeddings, engine.kb_dir)
+    elif args.watch:
+        watch_knowledge_base(engine.client, engine.settings, engine.embeddings, engine.kb_dir)
+    else:
+        engine.sync()
@@ -0,0 +1,163 @@
+"""
+Structure-aware chunker for EU legal acts
+
+Splits the page stream of a regulation on its own structure instead of on
+character counts: one unit per recital in the preamble, then one unit per
+Article, tracked under its CHAPTER/SECTION, then one unit per ANNEX.
+Units are sized in tokens: a unit that fits ``chunk_tokens`` becomes a
+single chunk, longer units are split on paragraph/sentence boundaries with
+each continuation chunk starting with the unit heading.
+
+In the Official Journal layout the recital numbers often come out of the
+PDF as a run of markers ahead of their paragraphs, mixed with footnote
+markers. A marker only counts when it continues the recital numbering and
+stands in a block of its own (footnote markers come stacked in one block);
+it is queued and the next paragraph opens the oldest queued recital.
+Paragraphs with no queued number continue the current recital. Page headers
+and footers of the Official Journal are dropped. Chunks carry ``article``,
+``section`` and ``page`` metadata.
+"""
+
+from __future__ import annotations
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional
+
+from langchain.schema import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+try:
+    from .embedding_scheduler import estimate_tokens
+except ImportError:
+    from embedding_scheduler import estimate_tokens
+
+_ARTICLE_RE = re.compile(r"^Article\s+(\d+[a-z]?)$")
+_CHAPTER_RE = re.compile(r"^CHAPTER\s+([IVXLC]+)$")
+_SECTION_RE = re.compile(r"^SECTION\s+(\d+)$")
+_ANNEX_RE = re.compile(r"^ANNEX\s+([IVXLC]+)$")
+_RECITAL_RE = re.compile(r"^\((\d+)\)(?:\s+(\S.*))?$")
+_BOILERPLATE_RE = re.compile(r"^(EN|OJ\s+L,\s+[\d.]+|ELI:\s+\S+|\d+/\d+|L\s+series)$")
+
+
+@dataclass
+class _Unit:
+    """Text of one structural unit while it is being collected"""
+    article: Optional[str]
+    section: Optional[str]
+    page: Optional[int]
+    heading: str = ""
+    lines: List[str] = field(default_factory=list)
+
+    def text(self) -> str:
+        return "\n".join(self.lines).strip()
+
+
+class LegalChunker:
+    """Turn a stream of page Documents of one or more acts into structure-aware chunks"""
+
+    def __init__(self, chunk_tokens: int = 384, chunk_overlap_tokens: int = 48):
+        self.chunk_tokens = chunk_tokens
+        self.splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_tokens,
+            chunk_overlap=chunk_overlap_tokens,
+            length_function=estimate_tokens,
+            separators=["\n\n", "\n", ". ", "; ", ", ", " ", ""],
+        )
+
+    def _emit(self, unit: _Unit, source: str) -> Iterator[Document]:
+        text = unit.text()
+        if not text:
+            return
+        meta = {"source": source, "page": unit.page, "article": unit.article, "section": unit.section}
+        if estimate_tokens(text) <= self.chunk_tokens:
+            yield Document(page_content=text, metadata=dict(meta))
+            return
+        for i, part in enumerate(self.splitter.split_text(text)):
+            if i and unit.heading:
+                part = f"{unit.heading} (cont.)\n{part}"
+            yield Document(page_content=part, metadata=dict(meta))
+
+    def _iter_units(self, pages: Iterable[Document]) -> Iterator[tuple]:
+        """Yield ``(source, unit)`` for every structural unit, in document order"""
+        source = None
+        unit: Optional[_Unit] = None
+        chapter = section = None
+        in_preamble = True
+        expect_title = False
+        recitals: deque = deque()  # recital numbers waiting for their paragraph
+        last_recital = 0
+        para_break = False
+        for page in pages:
+            if page.metadata.get("source") != source:
+                if unit is not None:
+                    yield source, unit
+                source = page.metadata.get("source")
+                unit = _Unit(article=None, section="Preamble", page=page.metadata.get("page"))
+                chapter = section = None
+                in_preamble, expect_title = True, False
+                recitals.clear()
+                last_recital = 0
+            raw_lines = page.page_content.splitlines()
+            for i, raw in enumerate(raw_lines):
+                line = " ".join(raw.split())
+                if not line:
+                    para_break = True
+                    continue
+                if _BOILERPLATE_RE.match(line):
+                    continue
+                page_no = page.metadata.get("page")
+                recital = None  # number of the recital this line opens
+                marker = _RECITAL_RE.match(line) if in_preamble else None
+                if marker and int(marker.group(1)) == last_recital + 1:
+                    if marker.group(2):
+                        # "(N) text": the recital starts on this line
+                        last_recital = recital = last_recital + 1
+                        recitals.clear()
+                        line = marker.group(2)
+                    elif para_break and (i + 1 == len(raw_lines) or not raw_lines[i + 1].strip()):
+                        last_recital += 1
+                        recitals.append(last_recital)
+                        continue
+                elif not marker and in_preamble and para_break and recitals:
+                    recital = recitals.popleft()
+                new_unit = None
+                if recital is not None:
+                    new_unit = _Unit(article=f"Recital {recital}", section="Preamble", page=page_no, heading=f"({recital})")
+                elif m := _CHAPTER_RE.match(line):
+                    chapter, section, in_preamble = f"Chapter {m.group(1)}", None, False
+                    new_unit = _Unit(article=None, section=chapter, page=page_no)
+                elif not in_preamble and (m := _SECTION_RE.match(line)):
+                    section = f"{chapter}, Section {m.group(1)}" if chapter else f"Section {m.group(1)}"
+                    new_unit = _Unit(article=None, section=section, page=page_no)
+                elif m := _ARTICLE_RE.match(line):
+                    in_preamble = False
+                    new_unit = _Unit(article=f"Article {m.group(1)}", section=section or chapter, page=page_no)
+                elif m := _ANNEX_RE.match(line):
+                    in_preamble = False
+                    chapter = section = f"Annex {m.group(1)}"
+                    new_unit = _Unit(article=f"Annex {m.group(1)}", section=section, page=page_no)
+                para_break = False
+                if new_unit is not None:
+                    if unit is not None:
+                        yield source, unit
+                    unit = new_unit
+                    if unit.section == "Preamble":
+                        unit.lines.append(unit.heading)
+                    else:
+                        expect_title = True
+                        unit.heading = line
+                        unit.lines.append(line)
+                        continue
+                if expect_title:
+                    # The line after "Article N" / "ANNEX N" is its title
+                    unit.heading = f"{unit.heading} {line}"
+                    expect_title = False
+                unit.lines.append(line)
+        if unit is not None:
+            yield source, unit
+
+    def split(self, pages: Iterable[Document]) -> Iterator[Document]:
+        """Stream chunks for a stream of pages"""
+        for source, unit in self._iter_units(pages):
+            yield from self._emit(unit, source)
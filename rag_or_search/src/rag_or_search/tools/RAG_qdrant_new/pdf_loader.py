@@ -0,0 +1,183 @@
+"""
+Parallel PDF text extraction with pdfminer
+
+The page list is split into ranges that are extracted in a process pool.
+Pages are yielded in document order with their 1-based page number, and
+only a bounded number of ranges is in flight so memory stays flat on
+large files. ``ParsedPdfCache`` keeps extracted page texts on disk so a
+restart does not re-parse unchanged files.
+"""
+
+from __future__ import annotations
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from io import StringIO
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pdfminer.converter import TextConverter
+from pdfminer.layout import LAParams
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+
+
+def pdf_page_count(file_path: str) -> int:
+    """Number of pages in a PDF"""
+    with open(file_path, "rb") as f:
+        doc = PDFDocument(PDFParser(f))
+        return sum(1 for _ in PDFPage.create_pages(doc))
+
+
+def extract_page_range(file_path: str, start: int, stop: int) -> List[str]:
+    """Extract the text of pages ``start..stop-1`` (0-based), one string per page"""
+    texts: List[str] = []
+    rsrcmgr = PDFResourceManager()
+    laparams = LAParams()
+    with open(file_path, "rb") as f:
+        for page in PDFPage.get_pages(f, pagenos=set(range(start, stop))):
+            out = StringIO()
+            device = TextConverter(rsrcmgr, out, laparams=laparams)
+            PDFPageInterpreter(rsrcmgr, device).process_page(page)
+            device.close()
+            texts.append(out.getvalue())
+    return texts
+
+
+def iter_page_texts(file_path: str, workers: int = 0, pages_per_task: int = 8) -> Iterator[Tuple[int, str]]:
+    """Yield ``(page_number, text)`` for every page, extracting ranges in parallel.
+
+    ``workers=0`` uses one process per CPU; ``workers=1`` extracts in-process.
+    """
+    workers = workers or os.cpu_count() or 1
+    n_pages = pdf_page_count(file_path)
+    ranges = [(s, min(s + pages_per_task, n_pages)) for s in range(0, n_pages, pages_per_task)]
+    if workers == 1 or len(ranges) == 1:
+        for start, stop in ranges:
+            for offset, text in enumerate(extract_page_range(file_path, start, stop)):
+                yield start + offset + 1, text
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        todo = iter(ranges)
+        # Keep at most two ranges per worker in flight
+        for start, stop in todo:
+            pending.append((start, pool.submit(extract_page_range, file_path, start, stop)))
+            if len(pending) >= workers * 2:
+                break
+        while pending:
+            start, fut = pending.popleft()
+            for offset, text in enumerate(fut.result()):
+                yield start + offset + 1, text
+            nxt = next(todo, None)
+            if nxt is not None:
+                pending.append((nxt[0], pool.submit(extract_page_range, file_path, *nxt)))
+
+
+# ========== Parsed-document cache ==========
+
+def file_sha256(file_path: str) -> str:
+    """sha256 of a file's bytes"""
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class ParsedPdfCache:
+    """On-disk cache of extracted page texts.
+
+    Entries are gzip-compressed JSON Lines files (one page text per line)
+    named by the file's content hash, so pages are written and read one at
+    a time. A small index maps (path, size, mtime) to that
+    hash, so a warm lookup costs one ``stat`` and one file read; when the
+    stat changed the content hash is recomputed, which still hits for a
+    touched or copied file whose bytes are unchanged.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, "index.json")
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                self._index: Dict[str, Dict] = json.load(f)
+        except (OSError, ValueError):
+            self._index = {}
+
+    def _entry_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, f"{digest}.jsonl.gz")
+
+    def _save_index(self):
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(tmp, self.index_path)
+
+    def digest_for(self, file_path: str) -> str:
+        """Content hash of ``file_path``, reusing the indexed one when size and mtime match"""
+        path = os.path.abspath(file_path)
+        st = os.stat(path)
+        with self._lock:
+            known = self._index.get(path)
+        if known and known["size"] == st.st_size and known["mtime"] == st.st_mtime:
+            return known["sha256"]
+        digest = file_sha256(path)
+        with self._lock:
+            self._index[path] = {"size": st.st_size, "mtime": st.st_mtime, "sha256": digest}
+            self._save_index()
+        return digest
+
+    def get(self, file_path: str) -> Optional[Iterator[str]]:
+        """Lazy iterator over the cached page texts of ``file_path``, or ``None``"""
+        entry = self._entry_path(self.digest_for(file_path))
+        if not os.path.exists(entry):
+            return None
+        return self._read(entry)
+
+    @staticmethod
+    def _read(entry: str) -> Iterator[str]:
+        with gzip.open(entry, "rt", encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def write_through(self, file_path: str, pages: Iterable[Tuple[int, str]]) -> Iterator[Tuple[int, str]]:
+        """Yield ``pages`` unchanged while appending them to a temporary entry.
+
+        The entry is renamed into place only once every page went through;
+        if the consumer stops early the partial file is removed.
+        """
+        entry = self._entry_path(self.digest_for(file_path))
+        tmp = f"{entry}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as f:
+                for page, text in pages:
+                    f.write(json.dumps(text) + "\n")
+                    yield page, text
+            os.replace(tmp, entry)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
+def iter_cached_page_texts(
+    file_path: str, cache: Optional[ParsedPdfCache], workers: int = 0, pages_per_task: int = 8
+) -> Iterator[Tuple[int, str]]:
+    """``iter_page_texts`` served from ``cache`` when possible, filling it on a miss"""
+    if cache is None:
+        yield from iter_page_texts(file_path, workers=workers, pages_per_task=pages_per_task)
+        return
+    pages = cache.get(file_path)
+    if pages is None:
+        # Stream pages to the consumer and into the cache entry at the same time
+        yield from cache.write_through(file_path, iter_page_texts(file_path, workers=workers, pages_per_task=pages_per_task))
+        return
+    yield from enumerate(pages, start=1)
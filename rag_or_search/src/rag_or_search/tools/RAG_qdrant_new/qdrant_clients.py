@@ -0,0 +1,89 @@
+"""
+Process-wide Qdrant clients
+
+One client per connection config, shared by every caller in the process,
+so searches reuse open connections instead of paying a new TCP/HTTP2
+handshake each time. gRPC is preferred when enabled; REST connections are
+pooled with keep-alive (qdrant-client disables keep-alive for localhost by
+default, which costs a connect per request). With ``path`` the client runs
+Qdrant embedded in the process instead: a folder on disk, or ``":memory:"``.
+"""
+
+from __future__ import annotations
+import asyncio
+import atexit
+import threading
+from typing import Any, Dict
+
+import httpx
+from qdrant_client import AsyncQdrantClient, QdrantClient
+
+_CLIENTS: Dict[tuple, QdrantClient] = {}
+_ASYNC_CLIENTS: Dict[tuple, AsyncQdrantClient] = {}
+_LOCK = threading.Lock()
+
+
+def client_kwargs(
+    url: str = "http://localhost:6333",
+    prefer_grpc: bool = True,
+    grpc_port: int = 6334,
+    pool_size: int = 8,
+    keepalive: float = 30.0,
+    timeout: int = 30,
+    path: str | None = None,
+) -> Dict[str, Any]:
+    """Constructor arguments shared by ``QdrantClient`` and ``AsyncQdrantClient``"""
+    if path == ":memory:":
+        return {"location": ":memory:"}
+    if path:
+        return {"path": path}
+    kwargs: Dict[str, Any] = {"url": url, "timeout": timeout, "prefer_grpc": prefer_grpc, "grpc_port": grpc_port}
+    if prefer_grpc:
+        # pool_size = number of gRPC channels; pings keep idle channels open
+        kwargs["pool_size"] = pool_size
+        kwargs["grpc_options"] = {
+            "grpc.keepalive_time_ms": int(keepalive * 1000),
+            "grpc.keepalive_timeout_ms": 10_000,
+            "grpc.keepalive_permit_without_calls": 1,
+        }
+    else:
+        kwargs["limits"] = httpx.Limits(
+            max_connections=pool_size, max_keepalive_connections=pool_size, keepalive_expiry=keepalive
+        )
+    return kwargs
+
+
+def get_client(**config) -> QdrantClient:
+    """Shared ``QdrantClient`` for ``client_kwargs(**config)``"""
+    key = tuple(sorted(config.items()))
+    with _LOCK:
+        if key not in _CLIENTS:
+            _CLIENTS[key] = QdrantClient(**client_kwargs(**config))
+        return _CLIENTS[key]
+
+
+def get_async_client(**config) -> AsyncQdrantClient:
+    """Shared ``AsyncQdrantClient`` for ``client_kwargs(**config)``; call it from the event loop that uses it.
+
+    In embedded mode the async client is a separate instance: a ``":memory:"``
+    store is not shared with the sync client, and a folder can only be
+    opened by one client at a time.
+    """
+    # gRPC aio channels are bound to the loop they were created on
+    key = (id(asyncio.get_running_loop()), *sorted(config.items()))
+    with _LOCK:
+        if key not in _ASYNC_CLIENTS:
+            _ASYNC_CLIENTS[key] = AsyncQdrantClient(**client_kwargs(**config))
+        return _ASYNC_CLIENTS[key]
+
+
+def close_clients():
+    """Close every shared sync client (async clients are closed with their loop)"""
+    with _LOCK:
+        for client in _CLIENTS.values():
+            client.close()
+        _CLIENTS.clear()
+
+
+# Embedded clients flush and unlock their folder on close; do it before interpreter teardown
+atexit.register(close_clients)
@@ -3,26 +3,31 @@ RAG pipeline with Qdrant and AzureOpenAI embeddings
 """
  
 from __future__ import annotations
+import hashlib
 import os
+import re
+import sys
+import threading
 import time
-from dataclasses import dataclass
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import List, Dict, Any, Iterable, Tuple
+from typing import List, Dict, Any, Iterable, Iterator, Tuple
  
 from dotenv import load_dotenv
 from langchain.schema import Document
 from langchain_openai import AzureOpenAIEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
-from langchain.document_loaders import PyPDFLoader, PDFMinerLoader
- 
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
 from langchain.chat_models import init_chat_model
  
 from qdrant_client.models import ScalarType
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.hybrid.fusion import distribution_based_score_fusion, reciprocal_rank_fusion
 from qdrant_client.models import (
     Distance,
     VectorParams,
@@ -30,15 +35,61 @@ from qdrant_client.models import (
     OptimizersConfigDiff,
     ScalarQuantization,
     ScalarQuantizationConfig,
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    ProductQuantization,
+    ProductQuantizationConfig,
+    CompressionRatio,
+    QuantizationSearchParams,
     PayloadSchemaType,
     FieldCondition,
+    FilterSelector,
     MatchValue,
+    Range,
     MatchText,
     Filter,
+    HasIdCondition,
     SearchParams,
     PointStruct,
+    PointIdsList,
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    SparseVectorParams,
+    SparseVector,
+    Modifier,
+    Prefetch,
+    QueryRequest,
+    FusionQuery,
+    Fusion,
 )
 
+try:  # imported as part of the package (RagTool)
+    from .embedding_cache import CachedEmbeddings, EmbeddingCache, QueryCachedEmbeddings
+    from .embedding_scheduler import ScheduledEmbeddings
+    from .pdf_loader import ParsedPdfCache, iter_cached_page_texts
+    from .kb_manifest import SUPPORTED_EXTENSIONS, KbChanges, KbManifest, scan_knowledge_base
+    from .dedup import NearDuplicateFilter
+    from .legal_chunker import LegalChunker
+    from .docstore import DocStore, matches_text
+    from .qdrant_clients import get_async_client, get_client
+    from .bm25 import Bm25Index, bm25_document_vector, bm25_query_vector
+    from .ttl_cache import TTLCache
+    from .semantic_cache import SemanticCache
+except ImportError:  # run as a script from this directory (ragas_qdrant.py)
+    from embedding_cache import CachedEmbeddings, EmbeddingCache, QueryCachedEmbeddings
+    from embedding_scheduler import ScheduledEmbeddings
+    from pdf_loader import ParsedPdfCache, iter_cached_page_texts
+    from kb_manifest import SUPPORTED_EXTENSIONS, KbChanges, KbManifest, scan_knowledge_base
+    from dedup import NearDuplicateFilter
+    from legal_chunker import LegalChunker
+    from docstore import DocStore, matches_text
+    from qdrant_clients import get_async_client, get_client
+    from bm25 import Bm25Index, bm25_document_vector, bm25_query_vector
+    from ttl_cache import TTLCache
+    from semantic_cache import SemanticCache
+
 CURRENT_FILE_PATH = os.path.abspath(__file__)
 CURRENT_DIRECTORY_PATH = os.path.dirname(CURRENT_FILE_PATH)
  
@@ -49,12 +100,38 @@ load_dotenv()
 class Settings:
     """Config settings for RAG pipeline"""
     qdrant_url: str = "http://localhost:6333"  # Qdrant URL
-    collection: str = "rag_chunks"             # Collection name
+    qdrant_path: str = os.getenv("QDRANT_PATH", "")  # Embedded Qdrant: folder (relative to this module) or ":memory:"; empty = server at qdrant_url
+    qdrant_prefer_grpc: bool = True            # Use gRPC (port qdrant_grpc_port) where supported
+    qdrant_grpc_port: int = 6334               # Qdrant gRPC port
+    qdrant_pool_size: int = 8                  # gRPC channels / pooled HTTP connections
+    qdrant_keepalive: float = 30.0             # Keep-alive of idle connections (seconds)
+    collection: str = "rag_chunks"             # Alias queried by the app (points to a versioned collection)
+    hnsw_m: int = 32                           # HNSW graph degree
+    hnsw_ef_construct: int = 256               # HNSW build-time candidate list
+    reindex_keep_versions: int = 1             # Previous versions kept after a reindex (rollback)
+    quantization: str = "scalar"               # "none", "scalar" (int8), "binary" or "product" (needs a reindex)
+    quantization_always_ram: bool = False      # Keep quantized vectors in RAM even when the originals are on disk
+    vectors_on_disk: bool = False              # Memmap the original dense vectors instead of keeping them in RAM
+    pq_compression: str = "x16"                # Product quantization ratio: x4, x8, x16, x32, x64
+    hnsw_ef: int = 256                         # HNSW search-time candidate list
+    quant_oversampling: float = 2.0            # Quantized candidates fetched per result before rescoring
+    quant_rescore: bool = True                 # Rescore quantized candidates with the original vectors
     emb_model_name: str = "embedding_model"  # Embedding model
+    chunker: str = "recursive"                 # "recursive" (chars) or "legal" (Article/Recital/Annex aware)
     chunk_size: int = 1000                      # Chunk size
     chunk_overlap: int = 200                   # Overlap size
+    chunk_tokens: int = 320                    # Max tokens per chunk (legal chunker; pair with final_k=4)
+    chunk_overlap_tokens: int = 48             # Overlap when splitting a long Article (legal chunker)
+    hybrid_mode: str = "fusion"                # "fusion": dense + BM25 sparse fused by Qdrant; "boost": dense + MatchText boost (needs a reindex)
+    fusion: str = "rrf"                        # Fusion of the dense and BM25 candidates in "fusion" mode: "rrf" or "dbsf"
+    bm25_k1: float = 1.2                       # BM25 term-frequency saturation
+    bm25_b: float = 0.75                       # BM25 length normalisation
+    bm25_avg_len: float = 256.0                # Assumed average chunk length (tokens) for BM25
+    lexical_channel: str = "qdrant"            # "boost" mode text channel: "qdrant" (MatchText) or "bm25" (in-process BM25 index)
+    parallel_lexical: bool = True              # "fusion" mode: run the BM25 lookup while the query is embedded and fuse on the client
     top_n_semantic: int = 30                   # Candidates for semantic search
-    top_n_text: int = 100                      # Candidates for text search
+    search_batch_size: int = 64                # Queries per query_batch_points request (hybrid_search_many)
+    top_n_text: int = 100                      # BM25 candidates in "fusion" mode
     final_k: int = 6                          # Final results count
     alpha: float = 0.75                        # Semantic weight
     text_boost: float = 0.20                   # Text boost
@@ -64,31 +141,78 @@ class Settings:
     lm_key_env: str = "OPENAI_API_KEY"         # LLM API key env
     lm_model_env: str = "LMSTUDIO_MODEL"       # LLM model env
     use_cache: bool = True                     # Enable embedding cache
-    cache_file: str = "embedding_cache.pkl"   # Cache file path
+    cache_file: str = "embedding_cache.sqlite3"  # Cache file path (relative to this module)
+    cache_max_entries: int = 200_000           # Cached vectors kept before LRU eviction
+    query_cache_size: int = 1024               # Query vectors kept in memory (0 disables)
+    query_cache_ttl: float = 3600.0            # Seconds a cached query vector stays valid (0 = no expiry)
+    result_cache_size: int = 512               # Final search hits kept in memory per (query, k, settings) (0 disables)
+    result_cache_ttl: float = 600.0            # Seconds cached hits stay valid; bounds staleness after a sync from another process
+    embed_concurrency: int = 4                 # Embedding requests in flight
+    embed_batch_tokens: int = 8000             # Max tokens per embedding request
+    embed_max_batch_size: int = 256            # Max texts per embedding request
+    embed_tokens_per_minute: int = 240_000     # Azure TPM quota of the deployment
+    embed_requests_per_minute: int = 1_440     # Azure RPM quota of the deployment
+    embed_max_retries: int = 6                 # Retries on 429 before giving up
+    ingest_window: int = 256                   # Chunks held in memory per embed/upsert step
+    dedup: bool = True                         # Drop near-duplicate chunks before embedding
+    dedup_threshold: float = 0.9               # MinHash Jaccard similarity counted as duplicate
+    dedup_num_perm: int = 64                   # MinHash permutations
+    pdf_workers: int = 0                       # PDF parsing processes (0 = one per CPU)
+    pdf_pages_per_task: int = 8                # Pages extracted per worker task
+    use_parse_cache: bool = True               # Reuse extracted PDF text across restarts
+    parse_cache_dir: str = "parsed_cache"      # Parsed-text cache folder (relative to this module)
+    kb_dir: str = "knowledge_base"             # Knowledge-base folder (relative to this module)
+    kb_sync_on_start: bool = True              # Sync the knowledge base when the engine starts
+    kb_poll_interval: float = 30.0             # Seconds between folder scans in watch mode
+    docstore: bool = False                     # Keep chunk texts in a local docstore, not in Qdrant payloads (needs a reindex)
+    docstore_file: str = "docstore.sqlite3"    # Docstore file path (relative to this module)
+    answer_cache: bool = True                  # Answer paraphrased flow requests from the semantic answer cache
+    answer_cache_file: str = "answer_cache.sqlite3"  # Answer cache file path (relative to this module)
+    answer_cache_threshold: float = 0.92       # Min cosine similarity between requests to reuse an answer
+    answer_cache_max_entries: int = 500        # Answers kept before LRU eviction
+    answer_cache_max_age: float = 604_800.0    # Seconds an answer stays valid (web answers age out, KB answers also follow the KB version)
  
 SETTINGS = Settings()
  
 # ========== Embeddings & LLM ==========
 
-def retry_with_backoff(func, max_retries=3, base_delay=1.0):
-    """Retry function with exponential backoff for rate limiting"""
-    for attempt in range(max_retries):
-        try:
-            return func()
-        except Exception as e:
-            if "429" in str(e) or "rate limit" in str(e).lower():
-                if attempt == max_retries - 1:
-                    raise e
-                delay = base_delay * (2 ** attempt)
-                print(f"Rate limit hit, waiting {delay} seconds before retry {attempt + 1}/{max_retries}")
-                time.sleep(delay)
-            else:
-                raise e
-    return None
+def get_embeddings(settings: Settings) -> ScheduledEmbeddings | CachedEmbeddings | QueryCachedEmbeddings:
+    """Return rate-limited Azure OpenAI embeddings, behind the on-disk and query caches if enabled"""
+    embeddings = ScheduledEmbeddings(
+        # The scheduler does its own batching, so one Azure request per batch
+        AzureOpenAIEmbeddings(model=settings.emb_model_name, chunk_size=settings.embed_max_batch_size),
+        concurrency=settings.embed_concurrency,
+        batch_tokens=settings.embed_batch_tokens,
+        max_batch_size=settings.embed_max_batch_size,
+        tokens_per_minute=settings.embed_tokens_per_minute,
+        requests_per_minute=settings.embed_requests_per_minute,
+        max_retries=settings.embed_max_retries,
+    )
+    if settings.use_cache:
+        cache_path = os.path.join(CURRENT_DIRECTORY_PATH, settings.cache_file)
+        cache = EmbeddingCache(cache_path, max_entries=settings.cache_max_entries)
+        embeddings = CachedEmbeddings(embeddings, cache, settings.emb_model_name)
+    if settings.query_cache_size:
+        embeddings = QueryCachedEmbeddings(embeddings, settings.query_cache_size, settings.query_cache_ttl)
+    return embeddings
+
+# Settings that get_embeddings builds the embeddings from
+EMBEDDINGS_FIELDS = (
+    "emb_model_name", "embed_max_batch_size", "embed_concurrency", "embed_batch_tokens", "embed_tokens_per_minute",
+    "embed_requests_per_minute", "embed_max_retries", "use_cache", "cache_file", "cache_max_entries",
+    "query_cache_size", "query_cache_ttl",
+)
+
+_EMBEDDINGS: Dict[tuple, Any] = {}
+_EMBEDDINGS_LOCK = threading.Lock()
 
-def get_embeddings(settings: Settings) -> AzureOpenAIEmbeddings:
-    """Return Azure OpenAI embeddings"""
-    return AzureOpenAIEmbeddings(model=settings.emb_model_name)
+def get_shared_embeddings(settings: Settings) -> ScheduledEmbeddings | CachedEmbeddings | QueryCachedEmbeddings:
+    """Return the process-wide ``get_embeddings(settings)``: one Azure client, cache connection and query cache"""
+    key = tuple(getattr(settings, f) for f in EMBEDDINGS_FIELDS)
+    with _EMBEDDINGS_LOCK:
+        if key not in _EMBEDDINGS:
+            _EMBEDDINGS[key] = get_embeddings(settings)
+        return _EMBEDDINGS[key]
  
 def get_llm(settings: Settings):
     """Initialize LLM if configured"""
@@ -138,189 +262,1002 @@ def simulate_corpus() -> List[Document]:
     ]
     return docs
 
-def load_pdf(file_path : str) -> List[Document]:
+_PARSE_CACHES: Dict[str, ParsedPdfCache] = {}
+_PARSE_CACHES_LOCK = threading.Lock()
+
+def get_parse_cache(settings: Settings) -> ParsedPdfCache | None:
+    """Return the shared parsed-text cache, or ``None`` if disabled"""
+    if not settings.use_parse_cache:
+        return None
+    cache_dir = os.path.join(CURRENT_DIRECTORY_PATH, settings.parse_cache_dir)
+    with _PARSE_CACHES_LOCK:
+        if cache_dir not in _PARSE_CACHES:
+            _PARSE_CACHES[cache_dir] = ParsedPdfCache(cache_dir)
+        return _PARSE_CACHES[cache_dir]
 
-    documents: List[Document] = []
-    
-    loader = PDFMinerLoader(file_path)
-    docs = loader.load()
-    
-    for doc in docs:
-            doc.metadata["source"] = os.path.basename(file_path)
-            documents.append(doc)
+def iter_pdf_pages(file_path: str, settings: Settings | None = None, source: str | None = None) -> Iterator[Document]:
+    """Stream the pages of a PDF as Documents, from the parsed-text cache or a process pool"""
+    s = settings or SETTINGS
+    source = source or os.path.basename(file_path)
+    pages = iter_cached_page_texts(file_path, get_parse_cache(s), workers=s.pdf_workers, pages_per_task=s.pdf_pages_per_task)
+    for page, text in pages:
+        yield Document(page_content=text, metadata={"source": source, "page": page})
 
-    return documents
+def load_pdf(file_path : str, settings: Settings | None = None) -> List[Document]:
+    """Load all pages of a PDF"""
+    return list(iter_pdf_pages(file_path, settings))
 
-def split_documents(docs: List[Document], settings: Settings) -> List[Document]:
-    """Split docs into chunks"""
-    splitter = RecursiveCharacterTextSplitter(
+def iter_file_pages(file_path: str, settings: Settings | None = None, source: str | None = None) -> Iterator[Document]:
+    """Stream a PDF, Markdown or HTML file as Documents"""
+    source = source or os.path.basename(file_path)
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == ".pdf":
+        yield from iter_pdf_pages(file_path, settings, source)
+        return
+    with open(file_path, encoding="utf-8", errors="replace") as f:
+        text = f.read()
+    if ext in (".html", ".htm"):
+        from bs4 import BeautifulSoup
+        text = BeautifulSoup(text, "html.parser").get_text("\n")
+    yield Document(page_content=text, metadata={"source": source})
+
+def iter_source_files(paths: Iterable[str]) -> Iterator[str]:
+    """Expand files and folders into the supported files they contain"""
+    for path in paths:
+        if os.path.isdir(path):
+            yield from sorted(str(p) for p in Path(path).rglob("*") if p.suffix.lower() in SUPPORTED_EXTENSIONS)
+        else:
+            yield path
+
+def get_splitter(settings: Settings) -> RecursiveCharacterTextSplitter:
+    """Return the chunk splitter configured by ``settings``"""
+    return RecursiveCharacterTextSplitter(
         chunk_size=settings.chunk_size,
         chunk_overlap=settings.chunk_overlap,
         separators=["\n\n", "\n", ". ", "? ", "! ", "; ", ": ", ", ", " ", ""],
     )
-    return splitter.split_documents(docs)
+
+def split_documents(docs: List[Document], settings: Settings) -> List[Document]:
+    """Split docs into chunks"""
+    return list(iter_chunks(docs, settings))
+
+def iter_chunks(pages: Iterable[Document], settings: Settings) -> Iterator[Document]:
+    """Split a stream of pages into a stream of chunks with the configured chunker"""
+    if settings.chunker == "legal":
+        yield from LegalChunker(settings.chunk_tokens, settings.chunk_overlap_tokens).split(pages)
+        return
+    splitter = get_splitter(settings)
+    for page in pages:
+        yield from splitter.split_documents([page])
+
+def iter_windows(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Group a stream into lists of at most ``size`` items"""
+    window: List[Any] = []
+    for item in items:
+        window.append(item)
+        if len(window) >= size:
+            yield window
+            window = []
+    if window:
+        yield window
  
 # ========== Qdrant ==========
  
+def qdrant_client_config(settings: Settings) -> Dict[str, Any]:
+    """Connection config for the shared client factory"""
+    if settings.qdrant_path:
+        path = settings.qdrant_path
+        if path != ":memory:":
+            path = os.path.join(CURRENT_DIRECTORY_PATH, path)
+        return {"path": path}
+    return {
+        "url": settings.qdrant_url,
+        "prefer_grpc": settings.qdrant_prefer_grpc,
+        "grpc_port": settings.qdrant_grpc_port,
+        "pool_size": settings.qdrant_pool_size,
+        "keepalive": settings.qdrant_keepalive,
+    }
+
 def get_qdrant_client(settings: Settings) -> QdrantClient:
-    """Return Qdrant client"""
-    return QdrantClient(url=settings.qdrant_url, timeout=30)
+    """Return the process-wide Qdrant client for ``settings``"""
+    return get_client(**qdrant_client_config(settings))
+
+def get_async_qdrant_client(settings: Settings) -> AsyncQdrantClient:
+    """Return the shared async Qdrant client for ``settings`` (call inside the event loop)"""
+    return get_async_client(**qdrant_client_config(settings))
+
+
 
+def quantization_config(settings: Settings):
+    """Quantization config for ``settings.quantization`` (``None`` stores only the original vectors)"""
+    mode = settings.quantization
+    always_ram = settings.quantization_always_ram
+    if mode == "none":
+        return None
+    if mode == "scalar":
+        return ScalarQuantization(scalar=ScalarQuantizationConfig(type=ScalarType.INT8, always_ram=always_ram))
+    if mode == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=always_ram))
+    if mode == "product":
+        return ProductQuantization(product=ProductQuantizationConfig(
+            compression=CompressionRatio(settings.pq_compression), always_ram=always_ram
+        ))
+    raise ValueError(f"Unknown quantization mode: {mode!r}")
+
+def search_params(settings: Settings, exact: bool = False) -> SearchParams:
+    """HNSW/quantization search params for ``query_points``"""
+    quantization = None
+    if settings.quantization != "none":
+        quantization = QuantizationSearchParams(
+            rescore=settings.quant_rescore, oversampling=settings.quant_oversampling
+        )
+    return SearchParams(hnsw_ef=settings.hnsw_ef, exact=exact, quantization=quantization)
+
+# Named vectors of "fusion" collections ("boost" collections have one unnamed dense vector)
+DENSE_VECTOR = "dense"
+SPARSE_VECTOR = "bm25"
+
+def dense_vector_name(settings: Settings) -> str | None:
+    """Name of the dense vector to query (``None`` for the unnamed vector)"""
+    return DENSE_VECTOR if settings.hybrid_mode == "fusion" else None
+
+def collection_vector_size(client: QdrantClient, collection: str) -> int:
+    """Dense vector size of an existing collection"""
+    vectors = client.get_collection(collection).config.params.vectors
+    if isinstance(vectors, dict):
+        vectors = vectors[DENSE_VECTOR]
+    return vectors.size
+
+def collection_hybrid_mode(client: QdrantClient, collection: str) -> str:
+    """Hybrid mode a collection supports: ``fusion`` if it has the BM25 sparse vector, else ``boost``"""
+    sparse = client.get_collection(collection).config.params.sparse_vectors or {}
+    return "fusion" if SPARSE_VECTOR in sparse else "boost"
+
+def create_rag_collection(client: QdrantClient, settings: Settings, vector_size: int, name: str):
+    """Create a collection ``name`` with the RAG vector config and payload indexes"""
+    dense = VectorParams(size=vector_size, distance=Distance.COSINE, on_disk=settings.vectors_on_disk)
+    fusion = settings.hybrid_mode == "fusion"
+    client.create_collection(
+        collection_name=name,
+        vectors_config={DENSE_VECTOR: dense} if fusion else dense,
+        # IDF is computed by Qdrant from the live collection; stored weights are TF only
+        sparse_vectors_config={SPARSE_VECTOR: SparseVectorParams(modifier=Modifier.IDF)} if fusion else None,
+        hnsw_config=HnswConfigDiff(m=settings.hnsw_m, ef_construct=settings.hnsw_ef_construct),
+        optimizers_config=OptimizersConfigDiff(default_segment_number=2),
+        quantization_config=quantization_config(settings),
+    )
+    if not settings.docstore and not fusion:
+        client.create_payload_index(name, "text", PayloadSchemaType.TEXT)
+    for key in ["doc_id", "source", "title", "lang", "article", "section"]:
+        client.create_payload_index(name, key, PayloadSchemaType.KEYWORD)
+    client.create_payload_index(name, "page", PayloadSchemaType.INTEGER)
+
+def new_version_name(settings: Settings) -> str:
+    """Name of a fresh versioned collection behind the ``settings.collection`` alias"""
+    return f"{settings.collection}_v{int(time.time() * 1000)}"
+
+def resolve_alias(client: QdrantClient, alias: str) -> str | None:
+    """Collection the alias points to (``None`` if ``alias`` is not an alias)"""
+    for a in client.get_aliases().aliases:
+        if a.alias_name == alias:
+            return a.collection_name
+    return None
 
+_COLLECTION_VERSIONS: Dict[str, int] = {}
+_VERSIONS_LOCK = threading.Lock()
+
+def collection_version(collection: str) -> int:
+    """In-process change counter of ``collection`` (part of the result cache keys)"""
+    return _COLLECTION_VERSIONS.get(collection, 0)
+
+def bump_collection_version(collection: str):
+    """Mark ``collection`` as changed, so results cached for it are no longer served"""
+    with _VERSIONS_LOCK:
+        _COLLECTION_VERSIONS[collection] = _COLLECTION_VERSIONS.get(collection, 0) + 1
 
 def recreate_collection_for_rag(client: QdrantClient, settings: Settings, vector_size: int):
-    """Create Qdrant collection and indexes only if they don't exist"""
+    """Create a versioned collection behind the ``settings.collection`` alias if neither exists"""
     if not client.collection_exists(settings.collection):
-        client.create_collection(
-            collection_name=settings.collection,
-            vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE),
-            hnsw_config=HnswConfigDiff(m=32, ef_construct=256),
-            optimizers_config=OptimizersConfigDiff(default_segment_number=2),
-            quantization_config=ScalarQuantization(
-                scalar=ScalarQuantizationConfig(type=ScalarType.INT8, always_ram=False)
-            ),
-        )
-        client.create_payload_index(settings.collection, "text", PayloadSchemaType.TEXT)
-        for key in ["doc_id", "source", "title", "lang"]:
-            client.create_payload_index(settings.collection, key, PayloadSchemaType.KEYWORD)
-    # If collection exists, do nothing (reuse existing collection and indexes)
+        version = new_version_name(settings)
+        create_rag_collection(client, settings, vector_size, version)
+        client.update_collection_aliases(change_aliases_operations=[
+            CreateAliasOperation(create_alias=CreateAlias(collection_name=version, alias_name=settings.collection))
+        ])
+        bump_collection_version(settings.collection)
+    # If collection/alias exists, do nothing (reuse existing collection and indexes)
 
 # ========== Ingest ==========
- 
-def build_points(chunks: List[Document], embeds: List[List[float]]) -> List[PointStruct]:
-    """Build Qdrant points"""
+
+# Namespace for deterministic point ids: uuid5(namespace, content hash)
+POINT_ID_NAMESPACE = uuid.UUID("6f0c4a52-3c1e-4d7b-9a55-2b8e0f6a1d93")
+
+def chunk_hash(source: str | None, text: str) -> str:
+    """Content hash of a chunk, keyed on its source and text"""
+    return hashlib.sha256(f"{source or ''}\x00{text}".encode("utf-8")).hexdigest()
+
+def chunk_point_id(content_hash: str) -> str:
+    """Stable Qdrant point id derived from a chunk content hash"""
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, content_hash))
+
+_DOCSTORES: Dict[str, DocStore] = {}
+_DOCSTORES_LOCK = threading.Lock()
+
+def get_docstore(settings: Settings) -> DocStore | None:
+    """Return the shared chunk-text docstore, or ``None`` if texts live in the payloads"""
+    if not settings.docstore:
+        return None
+    path = os.path.join(CURRENT_DIRECTORY_PATH, settings.docstore_file)
+    with _DOCSTORES_LOCK:
+        if path not in _DOCSTORES:
+            _DOCSTORES[path] = DocStore(path)
+        return _DOCSTORES[path]
+
+_BM25_INDEXES: Dict[str, Tuple[tuple | None, Bm25Index]] = {}  # path -> (stamp of the file it matches, index)
+_BM25_INDEXES_LOCK = threading.Lock()
+
+def bm25_index_path(settings: Settings) -> str:
+    """File of the in-process BM25 index of ``settings.collection`` (next to its manifest)"""
+    return os.path.join(CURRENT_DIRECTORY_PATH, f"bm25_index_{settings.collection}.npz")
+
+def file_stamp(path: str) -> tuple | None:
+    """(mtime, size, inode) of ``path``, or ``None`` if it does not exist; changes whenever the file is rewritten or replaced"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+def get_bm25_index(settings: Settings) -> Bm25Index | None:
+    """Return the collection's in-process BM25 index, or ``None`` if the lexical channel is Qdrant.
+
+    The index is reloaded when its file changed since it was loaded or saved
+    by this process (another process ingested, or a reindex replaced it).
+    """
+    if settings.lexical_channel != "bm25":
+        return None
+    path = bm25_index_path(settings)
+    stamp = file_stamp(path)
+    with _BM25_INDEXES_LOCK:
+        entry = _BM25_INDEXES.get(path)
+        if entry is None or entry[0] != stamp:
+            entry = _BM25_INDEXES[path] = (stamp, Bm25Index.load(path, settings.bm25_k1, settings.bm25_b))
+        return entry[1]
+
+def save_bm25_index(settings: Settings):
+    index = get_bm25_index(settings)
+    if index is not None:
+        path = bm25_index_path(settings)
+        with _BM25_INDEXES_LOCK:
+            index.save(path)
+            _BM25_INDEXES[path] = (file_stamp(path), index)  # our own write is not a reason to reload
+
+def build_points(chunks: List[Document], embeds: List[List[float]], with_text: bool = True, sparse: List[SparseVector] | None = None) -> List[PointStruct]:
+    """Build Qdrant points with content-addressed ids.
+
+    ``with_text=False`` leaves the text to the docstore; with ``sparse`` the
+    points get named dense + BM25 vectors.
+    """
     pts: List[PointStruct] = []
-    for i, (doc, vec) in enumerate(zip(chunks, embeds), start=1):
+    for i, (doc, vec) in enumerate(zip(chunks, embeds)):
+        h = chunk_hash(doc.metadata.get("source"), doc.page_content)
         payload = {
             "doc_id": doc.metadata.get("id"),
             "source": doc.metadata.get("source"),
             "title": doc.metadata.get("title"),
             "lang": doc.metadata.get("lang", "en"),
-            "text": doc.page_content,
-            "chunk_id": i - 1
+            "page": doc.metadata.get("page"),
+            "article": doc.metadata.get("article"),
+            "section": doc.metadata.get("section"),
+            "chunk_id": doc.metadata.get("chunk_id"),
+            "content_hash": h,
         }
-        pts.append(PointStruct(id=i, vector=vec, payload=payload))
+        if with_text:
+            payload["text"] = doc.page_content
+        vector = {DENSE_VECTOR: vec, SPARSE_VECTOR: sparse[i]} if sparse is not None else vec
+        pts.append(PointStruct(id=chunk_point_id(h), vector=vector, payload=payload))
     return pts
  
 def upsert_chunks(client: QdrantClient, settings: Settings, chunks: List[Document], embeddings: AzureOpenAIEmbeddings):
-    """Embed and upsert chunks with rate limiting"""
+    """Embed and upsert chunks; batching, concurrency and rate limits are handled by the embeddings scheduler"""
     print(f"Embedding {len(chunks)} chunks...")
-    
-    # Process chunks in smaller batches to avoid rate limits
-    batch_size = 10  # Reduce batch size for rate limiting
-    all_vecs = []
-    
-    for i in range(0, len(chunks), batch_size):
-        batch = chunks[i:i + batch_size]
-        print(f"Processing batch {i//batch_size + 1}/{(len(chunks)-1)//batch_size + 1}")
-        
-        # Use retry logic for embedding
-        def embed_batch():
-            return embeddings.embed_documents([c.page_content for c in batch])
-        
-        batch_vecs = retry_with_backoff(embed_batch, max_retries=5, base_delay=2.0)
-        all_vecs.extend(batch_vecs)
-        
-        # Add small delay between batches
-        if i + batch_size < len(chunks):
-            time.sleep(1.0)
-    
-    points = build_points(chunks, all_vecs)
+    start = time.perf_counter()
+    all_vecs = embeddings.embed_documents([c.page_content for c in chunks])
+    elapsed = time.perf_counter() - start
+    print(f"Embedded {len(chunks)} chunks in {elapsed:.1f}s ({len(chunks) / max(elapsed, 1e-9):.1f} chunks/s)")
+
+    store = get_docstore(settings)
+    sparse = None
+    if settings.hybrid_mode == "fusion":
+        sparse = [bm25_document_vector(c.page_content, settings.bm25_k1, settings.bm25_b, settings.bm25_avg_len) for c in chunks]
+    points = build_points(chunks, all_vecs, with_text=store is None, sparse=sparse)
+    if store is not None:
+        # Texts first, so no point is searchable without its text
+        store.put_many((p.id, doc.page_content) for p, doc in zip(points, chunks))
     client.upsert(collection_name=settings.collection, points=points, wait=True)
+    index = get_bm25_index(settings)
+    if index is not None:
+        for p, doc in zip(points, chunks):
+            index.add(p.id, doc.page_content)
+    bump_collection_version(settings.collection)
+
+def scroll_ids(client: QdrantClient, collection: str, scroll_filter: Filter | None = None) -> set:
+    """Return the ids of all points of ``collection`` matching ``scroll_filter``"""
+    ids: set = set()
+    next_page = None
+    while True:
+        points, next_page = client.scroll(
+            collection_name=collection,
+            scroll_filter=scroll_filter,
+            limit=1024,
+            offset=next_page,
+            with_payload=False,
+            with_vectors=False,
+        )
+        ids.update(str(p.id) for p in points)
+        if not next_page:
+            break
+    return ids
+
+def existing_source_ids(client: QdrantClient, settings: Settings, source: str) -> set:
+    """Return the ids of all points currently stored for ``source``"""
+    return scroll_ids(client, settings.collection, Filter(must=[FieldCondition(key="source", match=MatchValue(value=source))]))
+
+def delete_texts(client: QdrantClient, settings: Settings, ids: set) -> int:
+    """Delete the docstore texts of points just removed from ``settings.collection``.
+
+    Texts that another collection still references (a version kept for
+    rollback) stay; ``prune_docstore`` drops them with that version.
+    """
+    store = get_docstore(settings)
+    if store is None or not ids:
+        return 0
+    live = resolve_alias(client, settings.collection) or settings.collection
+    shared: set = set()
+    for c in client.get_collections().collections:
+        if c.name != live:
+            shared.update(str(p.id) for p in client.retrieve(c.name, ids=list(ids), with_payload=False, with_vectors=False))
+    return store.delete_many({str(i) for i in ids} - shared)
+
+def delete_stale_points(client: QdrantClient, settings: Settings, source: str, wanted: set) -> int:
+    """Delete the points of ``source`` that are not in ``wanted``, with their texts"""
+    stale = existing_source_ids(client, settings, source) - wanted
+    if stale:
+        client.delete(collection_name=settings.collection, points_selector=PointIdsList(points=list(stale)), wait=True)
+        delete_texts(client, settings, stale)
+        index = get_bm25_index(settings)
+        if index is not None:
+            index.delete(stale)
+        bump_collection_version(settings.collection)
+    return len(stale)
+
+def ingest_chunks(client: QdrantClient, settings: Settings, chunks: Iterable[Document], embeddings: AzureOpenAIEmbeddings) -> Dict[str, int]:
+    """Incrementally sync a stream of chunks into the collection.
+
+    Chunks are processed in windows of ``settings.ingest_window``: each window
+    is checked against the collection, only chunks whose (source, text) hash
+    is not already stored are embedded, and the window is upserted before the
+    next one is read, so memory stays flat and early points are searchable
+    while the ingest runs. Chunks of a source must be contiguous in the
+    stream; when a source ends, its points that no longer appear are deleted.
+    Re-ingesting an unchanged source makes no embedding calls.
+
+    With ``settings.dedup`` a chunk that is a near-duplicate of a chunk kept
+    earlier in the same run is not embedded; its source/page is recorded in
+    the kept point's ``duplicates`` payload instead.
+    """
+    stats = {"added": 0, "deleted": 0, "unchanged": 0, "duplicates": 0}
+    current_source = None
+    wanted: set = set()   # point ids of the current source (ids only, not texts/vectors)
+    chunk_idx = 0
+    near_dups = NearDuplicateFilter(settings.dedup_threshold, settings.dedup_num_perm) if settings.dedup else None
+    store = get_docstore(settings)
+    index = get_bm25_index(settings)
+    duplicates: Dict[str, List[Dict[str, Any]]] = {}  # kept point id -> duplicate locations
+
+    def finish_source():
+        if current_source is None:
+            return
+        deleted = delete_stale_points(client, settings, current_source, wanted)
+        stats["deleted"] += deleted
+        print(f"[{current_source}] chunks: {len(wanted)}, deleted: {deleted}")
+
+    for window in iter_windows(chunks, settings.ingest_window):
+        fresh: List[Tuple[str, Document]] = []
+        dup_targets: set = set()
+        for doc in window:
+            source = doc.metadata.get("source")
+            if source != current_source:
+                finish_source()
+                current_source, wanted, chunk_idx = source, set(), 0
+            doc.metadata["chunk_id"] = chunk_idx
+            chunk_idx += 1
+            pid = chunk_point_id(chunk_hash(source, doc.page_content))
+            if pid in wanted and near_dups is None:
+                continue
+            if pid in wanted:
+                kept = pid  # exact repeat within the source
+            else:
+                kept = near_dups.check(pid, doc.page_content) if near_dups else None
+            if kept is not None:
+                loc = {"source": source, "page": doc.metadata.get("page")}
+                if loc not in duplicates.setdefault(kept, []):
+                    duplicates[kept].append(loc)
+                dup_targets.add(kept)
+                stats["duplicates"] += 1
+                continue
+            wanted.add(pid)
+            fresh.append((pid, doc))
+        if fresh:
+            stored = {str(p.id) for p in client.retrieve(settings.collection, ids=[pid for pid, _ in fresh], with_payload=False, with_vectors=False)}
+            if store is not None:
+                stored &= store.existing(stored)  # a point without its text is re-upserted
+            new_chunks = [doc for pid, doc in fresh if pid not in stored]
+            if index is not None:
+                # Stored points missing from the index (index file lost or channel just enabled)
+                for pid, doc in fresh:
+                    if pid in stored and pid not in index:
+                        index.add(pid, doc.page_content)
+            if new_chunks:
+                upsert_chunks(client, settings, new_chunks, embeddings)
+            stats["added"] += len(new_chunks)
+            stats["unchanged"] += len(fresh) - len(new_chunks)
+        for kept in dup_targets:
+            client.set_payload(collection_name=settings.collection, payload={"duplicates": duplicates[kept]}, points=[kept], wait=False)
+    finish_source()
+    save_bm25_index(settings)
+    print(f"Ingest done, added: {stats['added']}, deleted: {stats['deleted']}, unchanged: {stats['unchanged']}, near-duplicates skipped: {stats['duplicates']}")
+    return stats
+
+def ingest_paths(client: QdrantClient, settings: Settings, paths: Iterable[str], embeddings: AzureOpenAIEmbeddings) -> Dict[str, int]:
+    """Stream files and folders through load -> split -> embed -> upsert"""
+    pages = (page for path in iter_source_files(paths) for page in iter_file_pages(path, settings))
+    return ingest_chunks(client, settings, iter_chunks(pages, settings), embeddings)
+
+def delete_source(client: QdrantClient, settings: Settings, source: str):
+    """Delete every point of ``source``, with its texts"""
+    index = get_bm25_index(settings)
+    ids = existing_source_ids(client, settings, source) if index is not None or settings.docstore else set()
+    if index is not None:
+        index.delete(ids)
+    client.delete(
+        collection_name=settings.collection,
+        points_selector=FilterSelector(filter=Filter(must=[FieldCondition(key="source", match=MatchValue(value=source))])),
+        wait=True,
+    )
+    delete_texts(client, settings, ids)
+    bump_collection_version(settings.collection)
+    save_bm25_index(settings)
+
+def get_manifest(settings: Settings) -> KbManifest:
+    """Manifest of the files ingested into ``settings.collection``"""
+    return KbManifest(os.path.join(CURRENT_DIRECTORY_PATH, f"ingest_manifest_{settings.collection}.json"))
+
+def kb_version(kb_dir: str) -> str:
+    """Fingerprint of the knowledge-base folder (file names, sizes and mtimes); changes whenever a sync would re-ingest"""
+    h = hashlib.sha256()
+    for source, path in scan_knowledge_base(kb_dir).items():
+        st = os.stat(path)
+        h.update(f"{source}\x00{st.st_size}\x00{st.st_mtime}\n".encode("utf-8"))
+    return h.hexdigest()
+
+_ANSWER_CACHES: Dict[str, SemanticCache] = {}
+_ANSWER_CACHES_LOCK = threading.Lock()
+
+def get_answer_cache(settings: Settings) -> SemanticCache | None:
+    """Return the shared semantic answer cache of the flow, or ``None`` if disabled"""
+    if not settings.answer_cache:
+        return None
+    path = os.path.join(CURRENT_DIRECTORY_PATH, settings.answer_cache_file)
+    with _ANSWER_CACHES_LOCK:
+        if path not in _ANSWER_CACHES:
+            _ANSWER_CACHES[path] = SemanticCache(
+                path,
+                threshold=settings.answer_cache_threshold,
+                max_entries=settings.answer_cache_max_entries,
+                max_age=settings.answer_cache_max_age,
+            )
+        return _ANSWER_CACHES[path]
+
+def sync_knowledge_base(client: QdrantClient, settings: Settings, embeddings: AzureOpenAIEmbeddings, kb_dir: str | None = None) -> KbChanges:
+    """Re-ingest only the knowledge-base files added, changed or removed since the last sync.
+
+    Sources are named by their path relative to the folder. The manifest is
+    updated after each file, so an interrupted sync resumes where it stopped.
+    """
+    kb_dir = kb_dir or os.path.join(CURRENT_DIRECTORY_PATH, settings.kb_dir)
+    manifest = get_manifest(settings)
+    if not client.count(collection_name=settings.collection).count:
+        manifest.reset()  # empty/new collection: the manifest no longer describes it
+        if (index := get_bm25_index(settings)) is not None:
+            index.clear()
+    files = scan_knowledge_base(kb_dir)
+    changes = manifest.diff(files)
+    if not changes:
+        manifest.save()
+        print("Knowledge base unchanged.")
+        return changes
+    print(f"Knowledge base: {len(changes.added)} added, {len(changes.changed)} changed, {len(changes.removed)} removed")
+    for source in changes.added + changes.changed:
+        pages = iter_file_pages(files[source], settings, source)
+        stats = ingest_chunks(client, settings, iter_chunks(pages, settings), embeddings)
+        if not stats["added"] and not stats["unchanged"]:
+            delete_source(client, settings, source)  # file no longer yields any chunk
+        manifest.record(source, files[source])
+    for source in changes.removed:
+        delete_source(client, settings, source)
+        manifest.forget(source)
+    answers = get_answer_cache(settings)
+    if answers is not None and (dropped := answers.invalidate(kb_version(kb_dir))):
+        print(f"Answer cache: dropped {dropped} answers of the previous knowledge base")
+    return changes
+
+def watch_knowledge_base(client: QdrantClient, settings: Settings, embeddings: AzureOpenAIEmbeddings, kb_dir: str | None = None):
+    """Poll the knowledge-base folder and sync it whenever files change (Ctrl+C to stop)"""
+    print(f"Watching knowledge base every {settings.kb_poll_interval:.0f}s...")
+    try:
+        while True:
+            sync_knowledge_base(client, settings, embeddings, kb_dir)
+            time.sleep(settings.kb_poll_interval)
+    except KeyboardInterrupt:
+        print("Stopped watching knowledge base.")
  
+# ========== Reindex ==========
+
+def switch_alias(client: QdrantClient, alias: str, collection: str):
+    """Point ``alias`` at ``collection`` in one atomic alias update"""
+    ops = []
+    if resolve_alias(client, alias) is not None:
+        ops.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+    elif client.collection_exists(alias):
+        # Legacy layout: a real collection holds the alias name. It has to go
+        # before the alias can exist, so only this first migration has a gap.
+        print(f"Dropping legacy collection '{alias}' to replace it with an alias")
+        client.delete_collection(alias)
+    ops.append(CreateAliasOperation(create_alias=CreateAlias(collection_name=collection, alias_name=alias)))
+    client.update_collection_aliases(change_aliases_operations=ops)
+    bump_collection_version(alias)
+
+def remove_version_files(settings: Settings, version: str):
+    """Delete the manifest and BM25 index files of a versioned collection (and leftovers of interrupted writes)"""
+    vs = replace(settings, collection=version)
+    for path in (get_manifest(vs).path, bm25_index_path(vs)):
+        for p in (path, path + ".tmp", path + ".tmp.npz"):
+            if os.path.exists(p):
+                os.remove(p)
+    with _BM25_INDEXES_LOCK:
+        _BM25_INDEXES.pop(bm25_index_path(vs), None)
+
+def gc_collection_versions(client: QdrantClient, settings: Settings, keep: int) -> List[str]:
+    """Delete old versioned collections, keeping the live one and ``keep`` previous ones"""
+    live = resolve_alias(client, settings.collection)
+    prefix = f"{settings.collection}_v"
+    versions = sorted(
+        (c.name for c in client.get_collections().collections if c.name.startswith(prefix) and c.name != live),
+        key=lambda n: int(n[len(prefix):]) if n[len(prefix):].isdigit() else 0,
+    )
+    dropped = versions[:max(0, len(versions) - keep)]
+    for name in dropped:
+        client.delete_collection(name)
+        remove_version_files(settings, name)
+    return dropped
+
+def prune_docstore(client: QdrantClient, settings: Settings) -> int:
+    """Drop docstore texts that neither the live collection nor a kept version references.
+
+    Texts of points deleted while another version still used them for
+    rollback stay behind, so the docstore is pruned after versions are dropped.
+    """
+    store = get_docstore(settings)
+    if store is None:
+        return 0
+    prefix = f"{settings.collection}_v"
+    keep = scroll_ids(client, settings.collection)
+    for c in client.get_collections().collections:
+        if c.name.startswith(prefix):
+            keep |= scroll_ids(client, c.name)
+    return store.prune(keep)
+
+def reindex_collection(client: QdrantClient, settings: Settings, embeddings: AzureOpenAIEmbeddings, kb_dir: str | None = None, probe_query: str = "high-risk AI system") -> str:
+    """Blue/green rebuild of the whole knowledge base.
+
+    The knowledge base is ingested into a new versioned collection with the
+    current settings (chunking, HNSW, embedding model) while queries keep
+    reading the old one through the alias. Once the new collection is
+    populated and answers a probe query, the alias is switched atomically
+    and old versions beyond ``settings.reindex_keep_versions`` are dropped.
+    Returns the name of the new live collection.
+    """
+    version = new_version_name(settings)
+    vs = replace(settings, collection=version)
+    vector_size = len(embeddings.embed_query(probe_query))
+    print(f"Reindexing into '{version}' (vector size {vector_size})...")
+    create_rag_collection(client, settings, vector_size, version)
+    try:
+        get_manifest(vs).reset()
+        sync_knowledge_base(client, vs, embeddings, kb_dir)
+        # Warm-up and sanity check before any live query can reach the new version
+        if not client.count(collection_name=version).count:
+            raise RuntimeError(f"Reindex produced an empty collection '{version}'")
+        if not hybrid_search(client, vs, probe_query, embeddings):
+            raise RuntimeError(f"Probe query returned no hits on '{version}'")
+    except Exception:
+        # Leave nothing of the failed version behind: collection, files and the texts only it used
+        ids = scroll_ids(client, version)
+        client.delete_collection(version)
+        delete_texts(client, vs, ids)
+        remove_version_files(settings, version)
+        raise
+    switch_alias(client, settings.collection, version)
+    os.replace(get_manifest(vs).path, get_manifest(settings).path)
+    if settings.lexical_channel == "bm25":
+        os.replace(bm25_index_path(vs), bm25_index_path(settings))
+        with _BM25_INDEXES_LOCK:
+            _BM25_INDEXES.pop(bm25_index_path(vs), None)  # the live path reloads by itself: its file changed
+    dropped = gc_collection_versions(client, settings, settings.reindex_keep_versions)
+    if settings.docstore:
+        print(f"Docstore: pruned {prune_docstore(client, settings)} unused texts")
+    print(f"Alias '{settings.collection}' -> '{version}'; dropped: {dropped or 'none'}")
+    return version
+
 # ========== Search ==========
+
+@dataclass(frozen=True)
+class SearchFilter:
+    """Metadata restrictions of a search, pushed down to Qdrant (``None`` fields do not restrict)"""
+    source: str | None = None        # Knowledge-base file, e.g. "EU AI Act.pdf"
+    lang: str | None = None
+    doc_id: str | None = None
+    page_from: int | None = None     # First page (inclusive)
+    page_to: int | None = None       # Last page (inclusive)
+
+    def __bool__(self) -> bool:
+        return any(v is not None for v in (self.source, self.lang, self.doc_id, self.page_from, self.page_to))
+
+    def to_qdrant(self) -> Filter | None:
+        """The equivalent Qdrant ``Filter`` on the indexed payload fields, ``None`` if unrestricted"""
+        must: List[Any] = [
+            FieldCondition(key=key, match=MatchValue(value=value))
+            for key, value in (("source", self.source), ("lang", self.lang), ("doc_id", self.doc_id))
+            if value is not None
+        ]
+        if self.page_from is not None or self.page_to is not None:
+            must.append(FieldCondition(key="page", range=Range(gte=self.page_from, lte=self.page_to)))
+        return Filter(must=must) if must else None
+
+def query_filter_of(filters: SearchFilter | None) -> Filter | None:
+    """Qdrant ``Filter`` of optional search filters"""
+    return filters.to_qdrant() if filters is not None else None
  
-def qdrant_semantic_search(client: QdrantClient, settings: Settings, query: str, embeddings: AzureOpenAIEmbeddings, limit: int, with_vectors: bool = False):
-    """Semantic search in Qdrant with retry logic"""
-    def embed_query():
-        return embeddings.embed_query(query)
-    
-    qv = retry_with_backoff(embed_query, max_retries=5, base_delay=2.0)
+def qdrant_semantic_search(client: QdrantClient, settings: Settings, query: str, embeddings: AzureOpenAIEmbeddings, limit: int, with_vectors: bool = False, query_vector: List[float] | None = None, query_filter: Filter | None = None):
+    """Semantic search in Qdrant (pass ``query_vector`` to skip embedding)"""
+    qv = query_vector if query_vector is not None else embeddings.embed_query(query)
     res = client.query_points(
         collection_name=settings.collection,
         query=qv,
+        using=dense_vector_name(settings),
+        query_filter=query_filter,
         limit=limit,
         with_payload=True,
         with_vectors=with_vectors,
-        search_params=SearchParams(hnsw_ef=256, exact=False),
+        search_params=search_params(settings),
     )
     return res.points
  
-def qdrant_text_prefilter_ids(client: QdrantClient, settings: Settings, query: str, max_hits: int) -> List[int]:
-    """Return ids matching text filter"""
-    matched_ids: List[int] = []
-    next_page = None
-    while True:
-        points, next_page = client.scroll(
-            collection_name=settings.collection,
-            scroll_filter=Filter(must=[FieldCondition(key="text", match=MatchText(text=query))]),
-            limit=min(256, max_hits - len(matched_ids)),
-            offset=next_page,
-            with_payload=False,
-            with_vectors=False,
-        )
-        matched_ids.extend([p.id for p in points])
-        if not next_page or len(matched_ids) >= max_hits:
-            break
-    return matched_ids
+def qdrant_text_match_ids(client: QdrantClient, settings: Settings, query: str, candidate_ids: List[Any]) -> set:
+    """Return the candidate ids whose text matches ``query`` (one request, cost bounded by the candidates)"""
+    if not candidate_ids:
+        return set()
+    points, _ = client.scroll(
+        collection_name=settings.collection,
+        scroll_filter=Filter(must=[
+            HasIdCondition(has_id=list(candidate_ids)),
+            FieldCondition(key="text", match=MatchText(text=query)),
+        ]),
+        limit=len(candidate_ids),
+        with_payload=False,
+        with_vectors=False,
+    )
+    return {p.id for p in points}
  
 def mmr_select(query_vec: List[float], candidates_vecs: List[List[float]], k: int, lambda_mult: float) -> List[int]:
-    """Select diverse results with MMR"""
+    """Select diverse results with MMR.
+
+    Vectorized: norms and query similarities are computed once, and a
+    running max-similarity-to-selected array is updated with one
+    similarity column per pick (O(k*n*d)). Ties go to the lowest index.
+    """
     import numpy as np
     V = np.array(candidates_vecs, dtype=float)
     q = np.array(query_vec, dtype=float)
-    def cos(a, b):
-        na = (a @ a) ** 0.5 + 1e-12
-        nb = (b @ b) ** 0.5 + 1e-12
-        return float((a @ b) / (na * nb))
-    sims = [cos(v, q) for v in V]
-    selected: List[int] = []
-    remaining = set(range(len(V)))
-    while len(selected) < min(k, len(V)):
-        if not selected:
-            best = max(remaining, key=lambda i: sims[i])
-            selected.append(best)
-            remaining.remove(best)
-            continue
-        best_idx = None
-        best_score = -1e9
-        for i in remaining:
-            max_div = max([cos(V[i], V[j]) for j in selected]) if selected else 0.0
-            score = lambda_mult * sims[i] - (1 - lambda_mult) * max_div
-            if score > best_score:
-                best_score = score
-                best_idx = i
-        selected.append(best_idx)
-        remaining.remove(best_idx)
-    return selected
+    n = len(V)
+    if not n or k <= 0:
+        return []
+    norms = np.sqrt(np.einsum("ij,ij->i", V, V)) + 1e-12
+    sims = np.einsum("ij,j->i", V, q) / (norms * ((q @ q) ** 0.5 + 1e-12))
+    best = int(np.argmax(sims))
+    selected: List[int] = [best]
+    max_div = np.full(n, -np.inf)
+    available = np.ones(n, dtype=bool)
+    while True:
+        available[best] = False
+        np.maximum(max_div, np.einsum("ij,j->i", V, V[best]) / (norms * norms[best]), out=max_div)
+        if len(selected) >= min(k, n):
+            return selected
+        scores = lambda_mult * sims - (1 - lambda_mult) * max_div
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
  
-def hybrid_search(client: QdrantClient, settings: Settings, query: str, embeddings: AzureOpenAIEmbeddings):
-    """Hybrid search with semantic + text + MMR"""
-    sem = qdrant_semantic_search(client, settings, query, embeddings, limit=settings.top_n_semantic, with_vectors=True)
+def fusion_prefetch(settings: Settings, query: str, query_vector: List[float], query_filter: Filter | None = None) -> List[Prefetch]:
+    """Dense + BM25 prefetches for a server-side fusion query, both restricted by ``query_filter``"""
+    prefetch = [Prefetch(query=query_vector, using=DENSE_VECTOR, filter=query_filter, limit=settings.top_n_semantic, params=search_params(settings))]
+    sparse = bm25_query_vector(query)
+    if sparse.indices:
+        prefetch.append(Prefetch(query=sparse, using=SPARSE_VECTOR, filter=query_filter, limit=settings.top_n_text))
+    return prefetch
+
+def qdrant_fusion_search(client: QdrantClient, settings: Settings, query: str, query_vector: List[float], limit: int, with_vectors: bool = False, query_filter: Filter | None = None):
+    """Dense + BM25 candidates fused by Qdrant (RRF/DBSF) in one ``query_points`` call"""
+    res = client.query_points(
+        collection_name=settings.collection,
+        prefetch=fusion_prefetch(settings, query, query_vector, query_filter),
+        query=FusionQuery(fusion=Fusion(settings.fusion)),
+        limit=limit,
+        with_payload=True,
+        with_vectors=[DENSE_VECTOR] if with_vectors else False,
+    )
+    return res.points
+
+def qdrant_sparse_search(client: QdrantClient, settings: Settings, query: str, limit: int, with_vectors: bool = False, query_filter: Filter | None = None):
+    """BM25 candidates from the sparse vector alone (needs no query embedding)"""
+    sparse = bm25_query_vector(query)
+    if not sparse.indices:
+        return []
+    res = client.query_points(
+        collection_name=settings.collection,
+        query=sparse,
+        using=SPARSE_VECTOR,
+        query_filter=query_filter,
+        limit=limit,
+        with_payload=True,
+        with_vectors=[DENSE_VECTOR] if with_vectors else False,
+    )
+    return res.points
+
+def parallel_fusion_search(client: QdrantClient, settings: Settings, query_vector: List[float], sparse: Future, limit: int, with_vectors: bool = False, query_filter: Filter | None = None):
+    """Dense candidates fused on the client with BM25 candidates fetched concurrently (same RRF/DBSF as Qdrant)"""
+    res = client.query_points(
+        collection_name=settings.collection,
+        query=query_vector,
+        using=DENSE_VECTOR,
+        query_filter=query_filter,
+        limit=settings.top_n_semantic,
+        with_payload=True,
+        with_vectors=[DENSE_VECTOR] if with_vectors else False,
+        search_params=search_params(settings),
+    )
+    responses = [res.points, sparse.result()]
+    if settings.fusion == "dbsf":
+        return distribution_based_score_fusion(responses, limit)
+    return reciprocal_rank_fusion(responses, limit)
+
+def local_text_scores(settings: Settings, query: str, sem: List[Any]) -> Dict[str, float] | None:
+    """Text scores of the candidates from an in-process channel (BM25 index or docstore), ``None`` for the Qdrant channel"""
+    index = get_bm25_index(settings)
+    if index is not None:
+        # Real BM25 scores, scaled so the best candidate gets the full boost
+        bm = index.score(query, [p.id for p in sem])
+        top = max(bm.values(), default=0.0)
+        return {pid: v / top for pid, v in bm.items()}
+    store = get_docstore(settings)
+    if store is not None:
+        # No text index in Qdrant: run the text match on the candidates' local texts
+        texts = store.get_many(p.id for p in sem)
+        return {str(p.id): 1.0 for p in sem if matches_text(query, texts.get(str(p.id), ""))}
+    return None
+
+def boost_rank(settings: Settings, sem: List[Any], text_scores: Dict[str, float]) -> List[Any]:
+    """Order semantic candidates by ``alpha`` x normalised score + ``text_boost`` x text score"""
     if not sem: return []
-    text_ids = set(qdrant_text_prefilter_ids(client, settings, query, settings.top_n_text))
     scores = [p.score for p in sem]
     smin, smax = min(scores), max(scores)
     def norm(x): return 1.0 if smax == smin else (x - smin) / (smax - smin)
-    fused: List[Tuple[int, float, Any]] = []
-    for idx, p in enumerate(sem):
-        base = norm(p.score)
-        fuse = settings.alpha * base
-        if p.id in text_ids:
-            fuse += settings.text_boost
-        fused.append((idx, fuse, p))
-    fused.sort(key=lambda t: t[1], reverse=True)
+    fused: List[Tuple[float, Any]] = []
+    for p in sem:
+        fuse = settings.alpha * norm(p.score) + settings.text_boost * text_scores.get(str(p.id), 0.0)
+        fused.append((fuse, p))
+    fused.sort(key=lambda t: t[0], reverse=True)
+    return [p for _, p in fused]
+
+def boosted_semantic_search(client: QdrantClient, settings: Settings, query: str, query_vector: List[float], query_filter: Filter | None = None):
+    """Semantic candidates re-ranked by ``alpha`` x normalised score + ``text_boost`` for text matches.
+
+    The text match runs on the candidates, which ``query_filter`` has
+    already narrowed.
+    """
+    sem = qdrant_semantic_search(client, settings, query, None, limit=settings.top_n_semantic, with_vectors=True,
+                                 query_vector=query_vector, query_filter=query_filter)
+    if not sem: return []
+    text_scores = local_text_scores(settings, query, sem)
+    if text_scores is None:
+        text_scores = dict.fromkeys(map(str, qdrant_text_match_ids(client, settings, query, [p.id for p in sem])), 1.0)
+    return boost_rank(settings, sem, text_scores)
+
+def point_vector(point) -> List[float]:
+    """Dense vector of a returned point (named or unnamed)"""
+    vec = point.vector
+    return vec[DENSE_VECTOR] if isinstance(vec, dict) else vec
+
+def select_results(settings: Settings, query_vector: List[float], ranked: List[Any]) -> List[Any]:
+    """Pick ``final_k`` of the ranked candidates (MMR if enabled) and attach docstore texts"""
+    if not ranked: return []
     if settings.use_mmr:
-        def embed_mmr_query():
-            return embeddings.embed_query(query)
-        
-        qv = retry_with_backoff(embed_mmr_query, max_retries=5, base_delay=2.0)
-        N = min(len(fused), max(settings.final_k * 5, settings.final_k))
-        cut = fused[:N]
-        vecs = [sem[i].vector for i, _, _ in cut]
-        mmr_idx = mmr_select(qv, vecs, settings.final_k, settings.mmr_lambda)
-        return [cut[i][2] for i in mmr_idx]
-    return [p for _, _, p in fused[:settings.final_k]]
+        N = min(len(ranked), max(settings.final_k * 5, settings.final_k))
+        cut = ranked[:N]
+        mmr_idx = mmr_select(query_vector, [point_vector(p) for p in cut], settings.final_k, settings.mmr_lambda)
+        winners = [cut[i] for i in mmr_idx]
+    else:
+        winners = ranked[:settings.final_k]
+    for p in winners:
+        p.vector = None  # only needed for MMR; keeps results (and cached results) small
+    store = get_docstore(settings)
+    if store is not None:
+        texts = store.get_many(p.id for p in winners)
+        for p in winners:
+            p.payload["text"] = texts.get(str(p.id), "")
+    return winners
+
+# Settings that change which hits a query returns (besides collection and final_k)
+RESULT_CACHE_FIELDS = (
+    "emb_model_name", "hybrid_mode", "fusion", "lexical_channel", "parallel_lexical", "docstore", "top_n_semantic", "top_n_text",
+    "alpha", "text_boost", "use_mmr", "mmr_lambda", "bm25_k1", "bm25_b", "hnsw_ef", "quant_oversampling", "quant_rescore",
+)
+
+_RESULT_CACHES: Dict[tuple, TTLCache] = {}
+_RESULT_CACHES_LOCK = threading.Lock()
+_QUERY_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+def normalize_query(query: str) -> str:
+    """Case- and punctuation-insensitive form of a query, so near-identical questions share a cache entry"""
+    return " ".join(_QUERY_WORD_RE.findall(query.casefold()))
+
+def result_cache_key(settings: Settings, query: str, filters: SearchFilter | None = None) -> tuple:
+    """Result cache key; includes the collection version, so any upsert/delete invalidates it"""
+    return (
+        settings.collection,
+        collection_version(settings.collection),
+        normalize_query(query),
+        settings.final_k,
+        filters or None,
+        tuple(getattr(settings, f) for f in RESULT_CACHE_FIELDS),
+    )
+
+def hits_nbytes(hits: List[Any]) -> int:
+    """Approximate memory held by a list of hits (points and payload values)"""
+    total = sys.getsizeof(hits)
+    for p in hits:
+        total += sys.getsizeof(p) + sys.getsizeof(p.payload or {})
+        total += sum(sys.getsizeof(v) for v in (p.payload or {}).values())
+    return total
+
+def get_result_cache(settings: Settings) -> TTLCache | None:
+    """Return the shared cache of final search hits, or ``None`` if disabled"""
+    if not settings.result_cache_size:
+        return None
+    key = (settings.result_cache_size, settings.result_cache_ttl)
+    with _RESULT_CACHES_LOCK:
+        if key not in _RESULT_CACHES:
+            _RESULT_CACHES[key] = TTLCache(settings.result_cache_size, settings.result_cache_ttl, sizeof=hits_nbytes)
+        return _RESULT_CACHES[key]
+
+# Shared pool for the lexical lookups hybrid_search starts ahead of the embedding
+_SEARCH_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="rag-lexical")
+
+def hybrid_search(client: QdrantClient, settings: Settings, query: str, embeddings: AzureOpenAIEmbeddings, filters: SearchFilter | None = None):
+    """Hybrid search: dense + lexical candidates ("fusion" or "boost" mode), then MMR.
+
+    ``filters`` restrict both channels to matching chunks inside Qdrant.
+    Hits are served from the result cache while the collection is unchanged.
+    """
+    query_filter = query_filter_of(filters)
+    cache = get_result_cache(settings)
+    if cache is not None:
+        key = result_cache_key(settings, query, filters)
+        hits = cache.get(key)
+        if hits is not None:
+            return list(hits)
+    sparse = None
+    if settings.hybrid_mode == "fusion" and settings.parallel_lexical:
+        # The BM25 lookup does not need the query vector: overlap it with the embedding call
+        sparse = _SEARCH_POOL.submit(qdrant_sparse_search, client, settings, query, settings.top_n_text,
+                                     settings.use_mmr, query_filter)
+    # One embedding per query, shared by the candidate search and MMR
+    qv = embeddings.embed_query(query)
+    if sparse is not None:
+        ranked = parallel_fusion_search(client, settings, qv, sparse, limit=settings.top_n_semantic,
+                                        with_vectors=settings.use_mmr, query_filter=query_filter)
+    elif settings.hybrid_mode == "fusion":
+        ranked = qdrant_fusion_search(client, settings, query, qv, limit=settings.top_n_semantic,
+                                      with_vectors=settings.use_mmr, query_filter=query_filter)
+    else:
+        ranked = boosted_semantic_search(client, settings, query, qv, query_filter)
+    hits = select_results(settings, qv, ranked)
+    if cache is not None:
+        cache.put(key, hits)
+    return list(hits)
+
+def embed_queries(embeddings: AzureOpenAIEmbeddings, queries: List[str]) -> List[List[float]]:
+    """Embed several queries in one batch (query cache first when available); rate limits are retried by ``ScheduledEmbeddings``"""
+    embed = getattr(embeddings, "embed_queries", embeddings.embed_documents)
+    return embed(queries)
+
+def qdrant_batch_points(client: QdrantClient, settings: Settings, requests: List[QueryRequest]) -> List[List[Any]]:
+    """Run ``query_batch_points`` in slices of ``settings.search_batch_size``; one point list per request"""
+    out: List[List[Any]] = []
+    for i in range(0, len(requests), settings.search_batch_size):
+        responses = client.query_batch_points(settings.collection, requests=requests[i:i + settings.search_batch_size])
+        out.extend(r.points for r in responses)
+    return out
+
+def hybrid_search_many(client: QdrantClient, settings: Settings, queries: List[str], embeddings: AzureOpenAIEmbeddings, filters: SearchFilter | None = None) -> List[List[Any]]:
+    """``hybrid_search`` for many queries (same ``filters`` for all), results in input order.
+
+    Cached queries are answered from the result cache. The others are
+    embedded in one batch; their candidate searches (and, in "boost" mode
+    with the Qdrant text channel, the candidate text checks) go to Qdrant as
+    ``query_batch_points`` requests of ``settings.search_batch_size``;
+    fusion and MMR run locally per query.
+    """
+    queries = list(queries)
+    cache = get_result_cache(settings)
+    if cache is None:
+        return batched_search(client, settings, queries, embeddings, filters)
+    keys = [result_cache_key(settings, q, filters) for q in queries]
+    out = [cache.get(key) for key in keys]
+    todo = [i for i, hits in enumerate(out) if hits is None]
+    for i, hits in zip(todo, batched_search(client, settings, [queries[i] for i in todo], embeddings, filters)):
+        cache.put(keys[i], hits)
+        out[i] = hits
+    return [list(hits) for hits in out]
+
+def batched_search(client: QdrantClient, settings: Settings, queries: List[str], embeddings: AzureOpenAIEmbeddings, filters: SearchFilter | None = None) -> List[List[Any]]:
+    """Uncached body of ``hybrid_search_many``"""
+    if not queries:
+        return []
+    query_filter = query_filter_of(filters)
+    vecs = embed_queries(embeddings, queries)
+    fusion = settings.hybrid_mode == "fusion"
+    if fusion:
+        requests = [
+            QueryRequest(prefetch=fusion_prefetch(settings, q, v, query_filter), query=FusionQuery(fusion=Fusion(settings.fusion)),
+                         limit=settings.top_n_semantic, with_payload=True, with_vector=[DENSE_VECTOR] if settings.use_mmr else False)
+            for q, v in zip(queries, vecs)
+        ]
+    else:
+        requests = [
+            QueryRequest(query=v, using=dense_vector_name(settings), filter=query_filter, limit=settings.top_n_semantic,
+                         params=search_params(settings), with_payload=True, with_vector=True)
+            for v in vecs
+        ]
+    ranked = qdrant_batch_points(client, settings, requests)
+    if not fusion:
+        text_scores = [local_text_scores(settings, q, sem) for q, sem in zip(queries, ranked)]
+        pending = [i for i, ts in enumerate(text_scores) if ts is None and ranked[i]]
+        checks = qdrant_batch_points(client, settings, [
+            QueryRequest(
+                filter=Filter(must=[
+                    HasIdCondition(has_id=[p.id for p in ranked[i]]),
+                    FieldCondition(key="text", match=MatchText(text=queries[i])),
+                ]),
+                limit=len(ranked[i]),
+                with_payload=False,
+            )
+            for i in pending
+        ])
+        for i, points in zip(pending, checks):
+            text_scores[i] = {str(p.id): 1.0 for p in points}
+        ranked = [boost_rank(settings, sem, ts or {}) for sem, ts in zip(ranked, text_scores)]
+    return [select_results(settings, v, r) for v, r in zip(vecs, ranked)]
  
 # ========== Prompt/Chain ==========
  
@@ -330,6 +1267,10 @@ def format_docs_for_prompt(points: Iterable[Any]) -> str:
     for p in points:
         pay = p.payload or {}
         src = pay.get("source", "unknown")
+        if pay.get("article"):
+            src = f"{src}, {pay['article']}"
+        if pay.get("page") is not None:
+            src = f"{src}, page:{pay['page']}"
         blocks.append(f"[source:{src}] {pay.get('text','')}")
     return "\n\n".join(blocks)
  
@@ -351,38 +1292,110 @@ def build_rag_chain(llm):
     )
     return chain
  
+# ========== Engine ==========
+
+class RagEngine:
+    """Long-lived retrieval engine that keeps clients and collection metadata warm.
+
+    The expensive setup (embeddings client, Qdrant client, vector size probe,
+    collection/index creation and the knowledge-base sync) runs once per
+    process in ``ensure_ready``; afterwards ``search`` goes straight to
+    ``hybrid_search``.
+    """
+
+    def __init__(self, settings: Settings, kb_dir: str | None = None):
+        self.settings = settings
+        self.kb_dir = kb_dir or os.path.join(CURRENT_DIRECTORY_PATH, settings.kb_dir)
+        self.embeddings: AzureOpenAIEmbeddings | None = None
+        self.client: QdrantClient | None = None
+        self.vector_size: int | None = None
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _probe_vector_size(self) -> int:
+        """Read the vector size from the collection, embedding a probe only if it is missing"""
+        s = self.settings
+        if self.client.collection_exists(s.collection):
+            return collection_vector_size(self.client, s.collection)
+        return len(self.embeddings.embed_query("hello world"))
+
+    def ensure_ready(self) -> "RagEngine":
+        """Initialise clients and collection once; safe to call from several threads"""
+        if self._ready:
+            return self
+        with self._lock:
+            if self._ready:
+                return self
+            s = self.settings
+            self.embeddings = get_shared_embeddings(s)
+            self.client = get_qdrant_client(s)
+            self.vector_size = self._probe_vector_size()
+            recreate_collection_for_rag(self.client, s, self.vector_size)
+            mode = collection_hybrid_mode(self.client, s.collection)
+            if mode != s.hybrid_mode:
+                print(f"Collection '{s.collection}' was built for hybrid_mode='{mode}'; using it until a reindex (kb_sync.py --reindex)")
+                s = self.settings = replace(s, hybrid_mode=mode)
+            # With an up-to-date manifest the sync is a folder stat, no parsing or embedding.
+            if s.kb_sync_on_start or not self.client.count(collection_name=s.collection).count:
+                self.sync()
+            self._ready = True
+        return self
+
+    def ingest(self, *paths: str) -> Dict[str, int]:
+        """Stream files or folders into the engine collection"""
+        return ingest_paths(self.client, self.settings, paths, self.embeddings)
+
+    def sync(self) -> KbChanges:
+        """Re-ingest the knowledge-base files that changed since the last sync"""
+        return sync_knowledge_base(self.client, self.settings, self.embeddings, self.kb_dir)
+
+    def search(self, query: str, k: int | None = None, filters: SearchFilter | None = None) -> List[Any]:
+        """Run ``hybrid_search`` with an optional per-call ``final_k`` and metadata filters"""
+        self.ensure_ready()
+        s = self.settings if k is None else replace(self.settings, final_k=k)
+        return hybrid_search(self.client, s, query, self.embeddings, filters)
+
+    def search_many(self, queries: List[str], k: int | None = None, filters: SearchFilter | None = None) -> List[List[Any]]:
+        """Run ``hybrid_search_many`` (results in input order) with an optional per-call ``final_k`` and metadata filters"""
+        self.ensure_ready()
+        s = self.settings if k is None else replace(self.settings, final_k=k)
+        return hybrid_search_many(self.client, s, queries, self.embeddings, filters)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Hit-rate stats of the result cache and of the caches in front of the embeddings"""
+        out: Dict[str, Dict[str, float]] = {}
+        results = get_result_cache(self.settings)
+        if results is not None:
+            out["search_results"] = results.stats()
+        emb = self.embeddings
+        while emb is not None:
+            if isinstance(emb, QueryCachedEmbeddings):
+                out["query_embeddings"] = emb.query_cache.stats()
+            elif isinstance(emb, CachedEmbeddings):
+                out["embedding_cache"] = emb.cache.stats()
+            emb = getattr(emb, "inner", None)
+        return out
+
+
+_ENGINE: RagEngine | None = None
+_ENGINE_LOCK = threading.Lock()
+
+def get_engine(settings: Settings | None = None) -> RagEngine:
+    """Return the process-wide ``RagEngine``, creating it on first use"""
+    global _ENGINE
+    if _ENGINE is None:
+        with _ENGINE_LOCK:
+            if _ENGINE is None:
+                _ENGINE = RagEngine(settings or SETTINGS)
+    return _ENGINE.ensure_ready()
+
 # ========== Main ==========
  
-def search_rag(q, k):
-    """Demo full RAG pipeline"""
+def search_rag(q, k, filters: SearchFilter | None = None):
+    """Retrieve the top-k contexts for ``q`` (optionally within ``filters``) through the shared warm engine"""
     print("--------- Starting RAG Search -----------")
-    s = SETTINGS
-    s.final_k = k
-    embeddings = get_embeddings(s)
-    llm = get_llm(s)
-    client = get_qdrant_client(s)
-    # docs = simulate_corpus()
-    docs = load_pdf(f"{CURRENT_DIRECTORY_PATH}/knowledge_base/EU AI Act.pdf")
-    chunks = split_documents(docs, s)
-    print(f"Docs: {len(docs)}, Chunks: {len(chunks)}")
-    
-    # Use retry logic for initial embedding call
-    def get_vector_size():
-        return len(embeddings.embed_query("hello world"))
-    
-    vector_size = retry_with_backoff(get_vector_size, max_retries=5, base_delay=2.0)
-    recreate_collection_for_rag(client, s, vector_size)
-    
-    # You only need to run upsert_chunks if your collection is empty or you want to update it.
-    # If the chunks are already embedded and present in Qdrant, you can skip this step.
-    if not client.count(collection_name=s.collection).count:
-        upsert_chunks(client, s, chunks, embeddings)
-    else:
-        print("Collection already populated, skipping upsert.")
-    
-    
-    hits = hybrid_search(client, s, q, embeddings)
+    hits = get_engine().search(q, k=k, filters=filters)
     if not hits:
         print("No result.")
         
-    return format_docs_for_prompt(hits)
\ No newline at end of file
+    return format_docs_for_prompt(hits)
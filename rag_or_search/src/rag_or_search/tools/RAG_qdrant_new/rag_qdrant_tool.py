@@ -1,13 +1,14 @@
 """CrewAI tool that wraps simple RAG retrieval utilities.
 
 Accepts a question and a ``k`` value to retrieve top-k contexts from a local
-vector store. Useful as an agent tool step before generation.
+vector store, optionally restricted by metadata (source file, language,
+document id, page range). Useful as an agent tool step before generation.
 """
 
-from typing import Type, List
+from typing import Type, List, Optional
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
-from .rag_qdrant_hybrid import search_rag
+from .rag_qdrant_hybrid import SearchFilter, format_docs_for_prompt, get_engine
 
 
 class RagToolInput(BaseModel):
@@ -19,9 +20,22 @@ class RagToolInput(BaseModel):
         Question to answer using RAG search.
     k : int
         Number of documents to retrieve for context.
+    source : str, optional
+        Only search this knowledge-base file.
+    lang : str, optional
+        Only search chunks in this language.
+    doc_id : str, optional
+        Only search chunks of this document id.
+    page_from, page_to : int, optional
+        Only search this page range (inclusive).
     """
     question: str = Field(..., description="Question to answer using RAG search.")
     k: int = Field(3, description="Number of documents to retrieve for context.")
+    source: Optional[str] = Field(None, description="Only search this knowledge-base file, e.g. 'EU AI Act.pdf'.")
+    lang: Optional[str] = Field(None, description="Only search chunks in this language code, e.g. 'en'.")
+    doc_id: Optional[str] = Field(None, description="Only search chunks of this document id.")
+    page_from: Optional[int] = Field(None, description="Only search from this page (inclusive).")
+    page_to: Optional[int] = Field(None, description="Only search up to this page (inclusive).")
 
 
 class RagTool(BaseTool):
@@ -38,16 +52,29 @@ class RagTool(BaseTool):
         "A tool that performs a Retrieval-Augmented Generation (RAG) search "
         "given a question and a number of documents to retrieve. "
         "Uses a local vector store and LLM to retrieve and answer based on "
-        "context. Returns a dictionary in the form { 'source': str, "
-        "'document': str }"
+        "context. Optional source, lang, doc_id and page_from/page_to "
+        "restrict the search to matching chunks. Returns a dictionary in the "
+        "form { 'source': str, 'document': str }"
     )
     args_schema: Type[BaseModel] = RagToolInput
 
-    def _run(self, question: str, k: int) -> List[str]:
+    def _run(
+        self,
+        question: str,
+        k: int,
+        source: Optional[str] = None,
+        lang: Optional[str] = None,
+        doc_id: Optional[str] = None,
+        page_from: Optional[int] = None,
+        page_to: Optional[int] = None,
+    ) -> List[str]:
         """Run retrieval with the provided inputs.
 
         Executes RAG search to retrieve relevant document contexts for a given
-        question using the configured vector store and embeddings.
+        question using the configured vector store and embeddings. The
+        process-wide ``RagEngine`` is reused, so only the first call pays for
+        client setup and collection checks. Metadata filters are applied
+        inside Qdrant, so they narrow the search instead of the results.
 
         Args
         ----
@@ -55,6 +82,10 @@ class RagTool(BaseTool):
             The query to retrieve contexts for.
         k : int
             Number of contexts to retrieve and return.
+        source, lang, doc_id : str, optional
+            Exact-match filters on the chunk metadata.
+        page_from, page_to : int, optional
+            Inclusive page range filter.
 
         Returns
         -------
@@ -77,6 +108,7 @@ class RagTool(BaseTool):
         """
         if not question:
             raise ValueError("Please provide a question for RAG search.")
-        results = search_rag(question, k=k)
+        filters = SearchFilter(source=source, lang=lang, doc_id=doc_id, page_from=page_from, page_to=page_to)
+        hits = get_engine().search(question, k=k, filters=filters)
 
-        return results
+        return format_docs_for_prompt(hits)
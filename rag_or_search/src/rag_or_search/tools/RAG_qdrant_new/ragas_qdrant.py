@@ -1,7 +1,7 @@
 from langchain_openai import AzureOpenAIEmbeddings
 from langchain_community.document_loaders import DirectoryLoader
 from typing import List
-from rag_qdrant_hybrid import CURRENT_DIRECTORY_PATH, SETTINGS, format_docs_for_prompt, get_embeddings, get_llm, get_qdrant_client, hybrid_search, load_pdf, recreate_collection_for_rag, retry_with_backoff, split_documents, upsert_chunks, build_rag_chain
+from rag_qdrant_hybrid import CURRENT_DIRECTORY_PATH, SETTINGS, format_docs_for_prompt, get_embeddings, get_llm, get_qdrant_client, hybrid_search_many, ingest_paths, recreate_collection_for_rag, build_rag_chain
 from ragas import evaluate, EvaluationDataset
 from ragas.metrics import (
     context_precision,   # "precision@k" sui chunk recuperati
@@ -18,7 +18,7 @@ def build_ragas_dataset(
     client,
     s,
     embeddings,
-    hybrid_search,
+    hybrid_search_many,
     k: int,
     ground_truth: dict[str, str] | None = None,
 ):
@@ -28,8 +28,9 @@ def build_ragas_dataset(
     """
     dataset = []
     chain = build_rag_chain(get_llm(s))
-    for q in questions:
-        docs = hybrid_search(client, s, q, embeddings)
+    # One embedding batch and batched Qdrant queries for the whole question set
+    results = hybrid_search_many(client, s, questions, embeddings)
+    for q, docs in zip(questions, results):
         contexts = [doc.payload["text"] if hasattr(doc, "payload") and "text" in doc.payload else getattr(doc, "page_content", str(doc)) for doc in docs]
         formatted_context = format_docs_for_prompt(docs)
         answer = chain.invoke({"question": q, "context": formatted_context})
@@ -54,23 +55,13 @@ if __name__ == "__main__":
     # docs = simulate_corpus()
     # loader = DirectoryLoader(f"{CURRENT_DIRECTORY_PATH}/../../../../outputs", glob="ai_act.md")
     # docs = loader.load()
-    docs = load_pdf(f"{CURRENT_DIRECTORY_PATH}/knowledge_base/EU AI Act.pdf")
-    chunks = split_documents(docs, s)
-    print(f"Docs: {len(docs)}, Chunks: {len(chunks)}")
     
-    # Use retry logic for initial embedding call
-    def get_vector_size():
-        return len(embeddings.embed_query("hello world"))
-    
-    vector_size = retry_with_backoff(get_vector_size, max_retries=5, base_delay=2.0)
+    # Rate limits are retried by the embedding scheduler
+    vector_size = len(embeddings.embed_query("hello world"))
     recreate_collection_for_rag(client, s, vector_size)
     
-    # You only need to run upsert_chunks if your collection is empty or you want to update it.
-    # If the chunks are already embedded and present in Qdrant, you can skip this step.
-    if not client.count(collection_name=s.collection).count:
-        upsert_chunks(client, s, chunks, embeddings)
-    else:
-        print("Collection already populated, skipping upsert.")
+    # Streaming + incremental: only new/changed chunks are embedded, removed ones are deleted.
+    ingest_paths(client, s, [f"{CURRENT_DIRECTORY_PATH}/knowledge_base/EU AI Act.pdf"], embeddings)
 
     # 5) Esempi di domande
     questions = [
@@ -79,11 +70,10 @@ if __name__ == "__main__":
         "I sistemi AI ad alto rischio devono rispettare specifici obblighi di trasparenza. Quale di questi è corretto?",
     ]
 
-    for q in questions:
+    for q, ans in zip(questions, hybrid_search_many(client, s, questions, embeddings)):
         print("=" * 80)
         print("Q:", q)
         print("-" * 80)
-        ans = hybrid_search(client, s, q, embeddings)
         print(ans)
         print()
 
@@ -100,7 +90,7 @@ if __name__ == "__main__":
         client=client,
         s=s,
         embeddings=embeddings,
-        hybrid_search=hybrid_search,
+        hybrid_search_many=hybrid_search_many,
         k=s.final_k,
         ground_truth=ground_truth,  # rimuovi se non vuoi correctness
     )
@@ -0,0 +1,149 @@
+"""
+Semantic answer cache backed by SQLite
+
+Stores final answers of the RAG-or-Search flow together with the
+embedding of the request that produced them. A new request is answered
+from the cache when an earlier one is close enough (cosine similarity at
+or above ``threshold``). Vectors are kept normalised in a NumPy matrix, so
+a lookup is one matrix-vector product over the (small) cache.
+
+Entries expire after ``max_age`` seconds and the least recently used ones
+are evicted above ``max_entries``. Answers that depend on the knowledge
+base carry the KB version they were built from; a lookup that finds one
+built from another version deletes it instead of serving it.
+"""
+
+from __future__ import annotations
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+
+
+@dataclass
+class CachedAnswer:
+    """A cache hit: the stored answer and how it matched"""
+    request: str
+    answer: str
+    route: str
+    created: float
+    similarity: float
+
+    @property
+    def age(self) -> float:
+        """Seconds since the answer was stored"""
+        return time.time() - self.created
+
+
+class SemanticCache:
+    """SQLite table of ``(request, route, answer, vector, kb_version)`` with an in-memory vector index"""
+
+    def __init__(self, path: str, threshold: float = 0.92, max_entries: int = 500, max_age: float = 7 * 86400.0):
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            "id INTEGER PRIMARY KEY, request TEXT NOT NULL, route TEXT NOT NULL, answer TEXT NOT NULL, "
+            "vector BLOB NOT NULL, kb_version TEXT, created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._load()
+
+    def _load(self):
+        rows = self._conn.execute("SELECT id, vector FROM answers").fetchall()
+        self._ids: List[int] = [row[0] for row in rows]
+        self._matrix = (np.stack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+                        if rows else np.zeros((0, 0), dtype=np.float32))
+
+    @staticmethod
+    def _normalise(vector: List[float]) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32)
+        return v / (np.linalg.norm(v) or 1.0)
+
+    def _delete(self, ids: List[int]):
+        """Drop rows and reload the index (caller holds the lock)"""
+        if ids:
+            self._conn.executemany("DELETE FROM answers WHERE id = ?", [(i,) for i in ids])
+            self._conn.commit()
+            self._load()
+
+    def lookup(self, vector: List[float], kb_version: str | None = None) -> CachedAnswer | None:
+        """Closest stored answer at or above ``threshold``, or ``None``.
+
+        Entries stored with a KB version other than ``kb_version`` are
+        deleted on the way, as are expired ones.
+        """
+        q = self._normalise(vector)
+        now = time.time()
+        with self._lock:
+            if not self._ids or self._matrix.shape[1] != len(q):
+                return None
+            sims = self._matrix @ q
+            stale: List[int] = []
+            hit = None
+            for i in np.argsort(-sims):
+                if sims[i] < self.threshold:
+                    break
+                row = self._conn.execute(
+                    "SELECT request, route, answer, kb_version, created FROM answers WHERE id = ?", (self._ids[i],)
+                ).fetchone()
+                if row is None:  # deleted by another process since the index was loaded
+                    continue
+                request, route, answer, version, created = row
+                if now - created > self.max_age or (version is not None and version != kb_version):
+                    stale.append(self._ids[i])
+                    continue
+                self._conn.execute("UPDATE answers SET last_used = ? WHERE id = ?", (now, self._ids[i]))
+                self._conn.commit()
+                hit = CachedAnswer(request, answer, route, created, float(sims[i]))
+                break
+            self._delete(stale)
+        return hit
+
+    def store(self, request: str, vector: List[float], answer: str, route: str, kb_version: str | None = None):
+        """Add an answer; ``kb_version=None`` marks it as independent of the knowledge base"""
+        now = time.time()
+        blob = self._normalise(vector).tobytes()
+        with self._lock:
+            if self._ids and self._matrix.shape[1] != len(vector):
+                # Another embedding model: the stored vectors are not comparable any more
+                self._conn.execute("DELETE FROM answers")
+            self._conn.execute(
+                "INSERT INTO answers (request, route, answer, vector, kb_version, created, last_used) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (request, route, answer, blob, kb_version, now, now),
+            )
+            self._conn.execute("DELETE FROM answers WHERE created < ?", (now - self.max_age,))
+            # Least recently used entries go first
+            self._conn.execute(
+                "DELETE FROM answers WHERE id NOT IN (SELECT id FROM answers ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+            self._load()
+
+    def invalidate(self, kb_version: str) -> int:
+        """Delete every knowledge-base answer not built from ``kb_version``; return how many were deleted"""
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM answers WHERE kb_version IS NOT NULL AND kb_version != ?", (kb_version,)
+            )
+            self._conn.commit()
+            self._load()
+        return cur.rowcount
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM answers")
+            self._conn.commit()
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._ids)
@@ -0,0 +1,92 @@
+"""
+In-memory LRU cache with time-to-live
+
+A thread-safe ``OrderedDict`` capped at ``max_entries`` (least recently used
+entries are evicted first). Entries older than ``ttl`` seconds are treated
+as misses and dropped; ``ttl=0`` keeps entries until they are evicted.
+With a ``sizeof`` function the cache also tracks the approximate memory
+held by its values.
+"""
+
+from __future__ import annotations
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+_MISSING = object()
+
+
+class TTLCache:
+    """LRU + TTL map with hit/miss counters"""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 0.0, sizeof: Callable[[Any], int] | None = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[Hashable, Tuple[float, Any, int]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Cached value of ``key``, or ``default`` if missing or expired"""
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING and self.ttl and now - item[0] > self.ttl:
+                self._drop(key)
+                self.expired += 1
+                item = _MISSING
+            if item is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key: Hashable, value: Any):
+        """Store ``value`` and evict the least recently used entries above the cap"""
+        size = self.sizeof(value) if self.sizeof else 0
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (time.monotonic(), value, size)
+            self.nbytes += size
+            while len(self._data) > self.max_entries:
+                self._drop(next(iter(self._data)))
+                self.evictions += 1
+
+    def _drop(self, key: Hashable):
+        self.nbytes -= self._data.pop(key)[2]
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.nbytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss/eviction counters and current size (plus ``bytes`` with a ``sizeof`` function)"""
+        total = self.hits + self.misses
+        out = {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._data),
+            "evictions": self.evictions,
+            "expired": self.expired,
+        }
+        if self.sizeof:
+            out["bytes"] = self.nbytes
+        return out
@@ -1,7 +1,7 @@
 import os
+import sys
 from dotenv import load_dotenv
  
-from qdrant_client import QdrantClient
 from langchain_openai import AzureOpenAIEmbeddings, AzureChatOpenAI
 from langchain_community.vectorstores import Qdrant
  
@@ -25,7 +25,11 @@ embeddings = AzureOpenAIEmbeddings(
     api_version=azure_api_version
 )
  
-qdrant_client = QdrantClient(host="localhost", port=6333)
+# Shared, pooled client from the new pipeline (REST + keep-alive: this setup only exposes :6333)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "RAG_qdrant_new"))
+from qdrant_clients import get_client
+
+qdrant_client = get_client(url="http://localhost:6333", prefer_grpc=False)
  
 # Reconnect to the same collection you stored chunks into earlier
 vector_store = Qdrant(
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test del filtro near-duplicate (MinHash + LSH): la similarità stimata deve
+seguire la Jaccard esatta degli shingle
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+
+from src.rag_or_search.tools.RAG_qdrant_new.dedup import NearDuplicateFilter, _WORD_RE
+
+VOCAB = np.array([f"w{i}" for i in range(5000)])
+
+
+def shingles(text, k=5):
+    words = _WORD_RE.findall(text.lower())
+    return {" ".join(words[i:i + k]) for i in range(max(1, len(words) - k + 1))}
+
+
+def edited_pairs(n, seed=0):
+    """Coppie (testo, testo con una parte delle parole sostituite) con Jaccard da ~0 a ~1"""
+    rng = np.random.default_rng(seed)
+    for _ in range(n):
+        base = rng.choice(VOCAB, 300)
+        other = base.copy()
+        edited = rng.choice(300, int(rng.integers(1, 200)), replace=False)
+        other[edited] = rng.choice(VOCAB, len(edited))
+        yield " ".join(base), " ".join(other)
+
+
+def test_estimated_jaccard_matches_exact():
+    f = NearDuplicateFilter(threshold=0.9, num_perm=128)
+    errors = []
+    for a, b in edited_pairs(200):
+        sa, sb = shingles(a), shingles(b)
+        exact = len(sa & sb) / len(sa | sb)
+        estimate = float(np.mean(f.signature(a) == f.signature(b)))
+        errors.append(estimate - exact)
+    errors = np.array(errors)
+    # Errore standard con 128 permutazioni: <= sqrt(0.25 / 128) ~ 0.044
+    assert abs(errors.mean()) < 0.01
+    assert np.abs(errors).max() < 0.2
+
+
+def test_no_false_positives_below_threshold():
+    flagged = 0
+    for a, b in edited_pairs(200, seed=1):
+        sa, sb = shingles(a), shingles(b)
+        if len(sa & sb) / len(sa | sb) >= 0.8:
+            continue
+        f = NearDuplicateFilter(threshold=0.9, num_perm=64)
+        f.check(0, a)
+        flagged += f.check(1, b) is not None
+    assert flagged == 0
+
+
+def test_flags_near_duplicates():
+    a, _ = next(edited_pairs(1, seed=2))
+    f = NearDuplicateFilter(threshold=0.9, num_perm=64)
+    assert f.check("a", a) is None
+    assert f.check("b", a + " footer") == "a"
+    assert f.check("c", " ".join(VOCAB[:300])) is None
+
+
+if __name__ == "__main__":
+    test_estimated_jaccard_matches_exact()
+    test_no_false_positives_below_threshold()
+    test_flags_near_duplicates()
+    print("ok")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test di equivalenza delle implementazioni vettorizzate con la versione
+ingenua: selezione MMR e indice BM25 in-process
+"""
+
+import math
+import os
+import sys
+from collections import Counter
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+os.environ["QDRANT_PATH"] = ":memory:"  # letto dai Settings all'import
+
+import numpy as np
+import pytest
+
+from src.rag_or_search.tools.RAG_qdrant_new.bm25 import Bm25Index, tokenize
+from src.rag_or_search.tools.RAG_qdrant_new.rag_qdrant_hybrid import mmr_select
+
+WORDS = [f"term{i}" for i in range(60)]
+
+
+def cosine(a, b):
+    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b) + 1e-12))
+
+
+def brute_force_mmr(query, vecs, k, lambda_mult):
+    """MMR come da definizione: a ogni passo il candidato con il punteggio più alto"""
+    if not len(vecs) or k <= 0:
+        return []
+    selected = [max(range(len(vecs)), key=lambda i: (cosine(vecs[i], query), -i))]
+    while len(selected) < min(k, len(vecs)):
+        def score(i):
+            diversity = max(cosine(vecs[i], vecs[j]) for j in selected)
+            return lambda_mult * cosine(vecs[i], query) - (1 - lambda_mult) * diversity
+        rest = [i for i in range(len(vecs)) if i not in selected]
+        selected.append(max(rest, key=lambda i: (score(i), -i)))
+    return selected
+
+
+def brute_force_bm25(docs, query, k1, b):
+    """Punteggi BM25 di ``docs`` (id -> testo) ricalcolati da zero"""
+    tokens = {pid: tokenize(text) for pid, text in docs.items()}
+    avg_len = sum(len(t) for t in tokens.values()) / len(tokens)
+    df = Counter(term for t in tokens.values() for term in set(t))
+    scores = {}
+    for pid, toks in tokens.items():
+        tf = Counter(toks)
+        score = 0.0
+        for term in set(tokenize(query)):
+            if tf[term]:
+                idf = math.log(1 + (len(docs) - df[term] + 0.5) / (df[term] + 0.5))
+                score += idf * tf[term] * (k1 + 1) / (tf[term] + k1 * (1 - b + b * len(toks) / avg_len))
+        if score > 0:
+            scores[pid] = score
+    return scores
+
+
+def test_mmr_matches_brute_force():
+    rng = np.random.default_rng(0)
+    for _ in range(300):
+        n, dim = int(rng.integers(0, 40)), int(rng.integers(2, 24))
+        vecs = rng.normal(size=(n, dim))
+        query = rng.normal(size=dim)
+        k = int(rng.integers(0, n + 3))
+        lambda_mult = float(rng.choice([0.0, 1.0, rng.random()]))
+        assert mmr_select(query.tolist(), vecs.tolist(), k, lambda_mult) == brute_force_mmr(query, vecs, k, lambda_mult)
+
+
+@pytest.mark.parametrize("k1,b", [(1.2, 0.75), (2.0, 0.3), (0.9, 1.0)])
+def test_bm25_index_matches_brute_force(k1, b):
+    rng = np.random.default_rng(int(k1 * 10 + b * 100))
+    index = Bm25Index(k1, b)
+    docs = {}
+    for step in range(400):
+        pid = f"p{int(rng.integers(0, 150))}"
+        if pid in docs and rng.random() < 0.3:
+            # Cancellazioni e re-inserimenti passano per i doc morti e la compattazione
+            index.delete([pid])
+            del docs[pid]
+        else:
+            docs[pid] = " ".join(rng.choice(WORDS, int(rng.integers(1, 80))))
+            index.add(pid, docs[pid])
+        if step % 40 == 39:
+            query = " ".join(rng.choice(WORDS, 3))
+            expected = brute_force_bm25(docs, query, k1, b)
+            got = index.score(query, docs)
+            assert got.keys() == expected.keys()
+            assert all(math.isclose(got[pid], expected[pid], rel_tol=1e-9) for pid in got)
+            top = index.search(query, 10)
+            assert [s for _, s in top] == pytest.approx(sorted(expected.values(), reverse=True)[:10])
+    assert len(index) == len(docs)
+
+
+def test_bm25_index_save_load(tmp_path):
+    index = Bm25Index()
+    for i in range(50):
+        index.add(f"p{i}", " ".join(WORDS[i % 7::3]))
+    index.delete([f"p{i}" for i in range(0, 50, 5)])
+    path = str(tmp_path / "bm25.npz")
+    index.save(path)
+    loaded = Bm25Index.load(path)
+    query = "term3 term10 term21"
+    assert loaded.search(query, 20) == index.search(query, 20)
+    assert len(Bm25Index.load(str(tmp_path / "missing.npz"))) == 0
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
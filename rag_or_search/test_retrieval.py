@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Test della pipeline di retrieval su Qdrant embedded (QDRANT_PATH=":memory:")
+con embeddings finti e deterministici: ingest, sync della knowledge base,
+filtri, parità della fusione locale/server e round trip su disco
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+os.environ["QDRANT_PATH"] = ":memory:"  # letto dai Settings all'import
+
+import hashlib
+from dataclasses import replace
+from itertools import count
+
+import numpy as np
+import pytest
+from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
+from qdrant_client import QdrantClient
+
+from src.rag_or_search.tools.RAG_qdrant_new import rag_qdrant_hybrid as rag
+
+WORDS = ("article provider high risk system conformity assessment market union "
+         "transparency data governance human oversight").split()
+COLLECTIONS = count()
+
+
+class FakeEmbeddings(Embeddings):
+    """Vettori casuali ma deterministici per testo; conta le chiamate"""
+
+    model = "fake"
+
+    def __init__(self, dim=32):
+        self.dim = dim
+        self.calls = 0
+
+    def _vector(self, text):
+        rng = np.random.default_rng(int(hashlib.md5(text.encode("utf-8")).hexdigest()[:8], 16))
+        return rng.normal(size=self.dim).tolist()
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text):
+        self.calls += 1
+        return self._vector(text)
+
+
+def fake_pages(n, seed, source):
+    rng = np.random.default_rng(seed)
+    return [Document(page_content=" ".join(rng.choice(WORDS, 400)), metadata={"source": source, "page": i + 1, "lang": "en"})
+            for i in range(n)]
+
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch):
+    """Settings su una collezione nuova; manifest, docstore e indici finiscono in tmp_path"""
+    monkeypatch.setattr(rag, "CURRENT_DIRECTORY_PATH", str(tmp_path))
+    s = replace(rag.SETTINGS, collection=f"test_{next(COLLECTIONS)}", result_cache_size=0, answer_cache=False, dedup=False)
+    rag.recreate_collection_for_rag(rag.get_qdrant_client(s), s, 32)
+    return s
+
+
+def ingest(settings, emb, pages):
+    return rag.ingest_chunks(rag.get_qdrant_client(settings), settings, iter(rag.split_documents(pages, settings)), emb)
+
+
+def sources_of(hits):
+    return {p.payload["source"] for p in hits}
+
+
+def test_client_is_embedded():
+    assert rag.SETTINGS.qdrant_path == ":memory:"
+    assert rag.get_qdrant_client(rag.SETTINGS) is rag.get_qdrant_client(rag.SETTINGS)
+
+
+@pytest.mark.parametrize("extra", [{}, {"hybrid_mode": "boost"}, {"hybrid_mode": "boost", "lexical_channel": "bm25"}, {"docstore": True}])
+def test_ingest_is_incremental(tmp_path, monkeypatch, extra):
+    monkeypatch.setattr(rag, "CURRENT_DIRECTORY_PATH", str(tmp_path))
+    s = replace(rag.SETTINGS, collection=f"test_{next(COLLECTIONS)}", result_cache_size=0, dedup=False, **extra)
+    client = rag.get_qdrant_client(s)
+    rag.recreate_collection_for_rag(client, s, 32)
+    emb = FakeEmbeddings()
+    pages = fake_pages(6, 0, "a.pdf") + fake_pages(6, 1, "b.pdf")
+    stats = ingest(s, emb, pages)
+    assert stats["added"] == client.count(s.collection).count > 0
+    assert rag.hybrid_search(client, s, "human oversight", emb)
+
+    # Stesso contenuto: nessun embedding, nessuna modifica
+    emb.calls = 0
+    stats = ingest(s, emb, pages)
+    assert emb.calls == 0 and stats["added"] == stats["deleted"] == 0
+
+    # Sorgente accorciata: i chunk spariti vengono cancellati
+    before = client.count(s.collection).count
+    stats = ingest(s, emb, fake_pages(3, 1, "b.pdf"))
+    assert stats["added"] == 0 and stats["deleted"] > 0
+    assert client.count(s.collection).count == before - stats["deleted"]
+    if s.docstore:
+        assert len(rag.get_docstore(s)) == client.count(s.collection).count
+
+
+def test_sync_knowledge_base(settings, tmp_path):
+    s = replace(settings, docstore=True)
+    client = rag.get_qdrant_client(s)
+    rag.recreate_collection_for_rag(client, s, 32)
+    emb = FakeEmbeddings()
+    kb = tmp_path / "kb"
+    kb.mkdir()
+    (kb / "a.md").write_text("# Oversight\n\n" + " ".join(WORDS * 40))
+    (kb / "b.md").write_text("# Market\n\n" + " ".join(reversed(WORDS * 40)))
+
+    changes = rag.sync_knowledge_base(client, s, emb, str(kb))
+    assert sorted(changes.added) == ["a.md", "b.md"]
+    assert not rag.sync_knowledge_base(client, s, emb, str(kb))
+
+    (kb / "a.md").write_text("# Oversight\n\n" + " ".join(WORDS[::-1] * 10))
+    (kb / "b.md").unlink()
+    changes = rag.sync_knowledge_base(client, s, emb, str(kb))
+    assert changes.changed == ["a.md"] and changes.removed == ["b.md"]
+    assert not rag.existing_source_ids(client, s, "b.md")
+    # I testi dei punti rimossi lasciano il docstore insieme ai punti
+    assert len(rag.get_docstore(s)) == client.count(s.collection).count
+
+
+def test_filters(settings):
+    client = rag.get_qdrant_client(settings)
+    emb = FakeEmbeddings()
+    ingest(settings, emb, fake_pages(8, 0, "a.pdf") + fake_pages(8, 1, "b.pdf"))
+    q = "human oversight"
+    assert rag.hybrid_search(client, settings, q, emb)
+    for source in ("a.pdf", "b.pdf"):
+        assert sources_of(rag.hybrid_search(client, settings, q, emb, rag.SearchFilter(source=source))) == {source}
+    hits = rag.hybrid_search(client, settings, q, emb, rag.SearchFilter(source="a.pdf", page_from=2, page_to=4))
+    assert hits and all(p.payload["source"] == "a.pdf" and 2 <= p.payload["page"] <= 4 for p in hits)
+    assert rag.hybrid_search(client, settings, q, emb, rag.SearchFilter(lang="de")) == []
+    many = rag.hybrid_search_many(client, settings, [q, "provider"], emb, rag.SearchFilter(source="b.pdf"))
+    assert all(sources_of(hits) == {"b.pdf"} for hits in many)
+
+
+@pytest.mark.parametrize("fusion", ["rrf", "dbsf"])
+@pytest.mark.parametrize("use_mmr", [True, False])
+def test_parallel_fusion_matches_server_fusion(settings, fusion, use_mmr):
+    """La fusione locale (lookup BM25 in parallelo all'embedding) deve dare gli stessi hit di Qdrant"""
+    client = rag.get_qdrant_client(settings)
+    emb = FakeEmbeddings()
+    ingest(settings, emb, fake_pages(30, 0, "a.pdf"))
+    local = replace(settings, fusion=fusion, use_mmr=use_mmr, parallel_lexical=True)
+    server = replace(local, parallel_lexical=False)
+    for f in (None, rag.SearchFilter(page_from=3, page_to=9)):
+        for q in ["human oversight", "provider market conformity", "zzz nothing"]:
+            a = rag.hybrid_search(client, local, q, emb, f)
+            b = rag.hybrid_search(client, server, q, emb, f)
+            assert [p.id for p in a] == [p.id for p in b], (q, f)
+
+
+def test_embedded_folder_round_trip(tmp_path, monkeypatch):
+    """Collezione scritta su disco da Qdrant embedded e riaperta da un altro client"""
+    monkeypatch.setattr(rag, "CURRENT_DIRECTORY_PATH", str(tmp_path))
+    s = replace(rag.SETTINGS, qdrant_path="qdrant_data", collection="round_trip", result_cache_size=0, dedup=False)
+    client = rag.get_qdrant_client(s)
+    rag.recreate_collection_for_rag(client, s, 32)
+    emb = FakeEmbeddings()
+    ingest(s, emb, fake_pages(6, 0, "a.pdf"))
+    before = [p.id for p in rag.hybrid_search(client, s, "human oversight", emb)]
+    n = client.count(s.collection).count
+    client.close()
+
+    reopened = QdrantClient(path=str(tmp_path / "qdrant_data"))
+    try:
+        assert reopened.count(s.collection).count == n
+        assert [p.id for p in rag.hybrid_search(reopened, s, "human oversight", emb)] == before
+    finally:
+        reopened.close()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))